@@ -1,15 +1,22 @@
 """LiveKit voice agent core connecting STT, LLM, and TTS pipeline."""
 import asyncio
+import ctypes
 import logging
+import struct
+import sys
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional
 
+import numpy as np
+import orjson
 import webrtcvad
 from livekit import rtc
 from livekit.agents import AutoSubscribe, JobContext, WorkerOptions, cli
+from google.genai.chats import AsyncChat
 
 from config import Config, load_config
 from stt import VoskSTT
@@ -18,8 +25,62 @@ from tts import PiperTTS
 
 logger = logging.getLogger(__name__)
 
+# Outgoing audio is pushed in 40ms frames; capture_frame back-pressures once the
+# source queue holds AUDIO_QUEUE_MS of audio, so no extra pacing is needed
+AUDIO_FRAME_MS = 40
+AUDIO_QUEUE_MS = 200
+
+# webrtcvad classifies 10ms frames (160 samples of 16kHz 16-bit mono audio)
+VAD_FRAME_BYTES = 320
+# Non-speech frames still forwarded after speech so Vosk hears word endings (100ms)
+VAD_HANGOVER_FRAMES = 10
+# Consecutive non-speech frames that end an utterance (800ms)
+VAD_END_OF_SPEECH_FRAMES = 80
+# Frames quieter than this multiple of the background noise energy skip webrtcvad
+VAD_ENERGY_GATE = 4.0
+# Background noise energy (mean square) starting value, lower bound and EWMA rate
+VAD_INITIAL_NOISE_FLOOR = 100.0
+VAD_MIN_NOISE_FLOOR = 25.0
+VAD_NOISE_FLOOR_ALPHA = 0.05
+
+# How often the silence watchdog checks whether the user has stopped talking
+SILENCE_POLL_INTERVAL = 0.2
+
+# Pre-serialized heads of the per-partial STT data messages; only the text is encoded per call
+STT_PARTIAL_PREFIX = b'{"type":"stt_partial","text":'
+STT_FINAL_PREFIX = b'{"type":"stt_final","text":'
+
+def _frame_energies(audio: memoryview) -> np.ndarray:
+    """Mean-square energy of each VAD frame in a 16-bit PCM buffer, in one vectorized pass."""
+    samples = np.frombuffer(audio, dtype=np.int16).reshape(-1, VAD_FRAME_BYTES // 2)
+    return np.mean(samples.astype(np.int32) ** 2, axis=1)
+
+
+def _parse_wav(audio_bytes: bytes) -> tuple[memoryview, int, int]:
+    """Locate the PCM16 data chunk inside a WAV blob without copying it.
+
+    Returns a byte view over the samples, the sample rate and the channel count.
+    """
+    if audio_bytes[:4] != b"RIFF" or audio_bytes[8:12] != b"WAVE":
+        raise ValueError("Audio is not a RIFF/WAVE buffer")
+    
+    sample_rate = 0
+    num_channels = 1
+    offset = 12
+    while offset + 8 <= len(audio_bytes):
+        chunk_id, chunk_size = struct.unpack_from("<4sI", audio_bytes, offset)
+        offset += 8
+        if chunk_id == b"fmt ":
+            _, num_channels, sample_rate = struct.unpack_from("<HHI", audio_bytes, offset)
+        elif chunk_id == b"data":
+            data = memoryview(audio_bytes)[offset:offset + chunk_size]
+            return data, sample_rate, num_channels
+        offset += chunk_size + (chunk_size & 1)  # Chunks are word-aligned
+    
+    raise ValueError("WAV buffer has no data chunk")
+
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TranscriptEntry:
     """Single entry in conversation transcript."""
     speaker: str
@@ -27,7 +88,7 @@ class TranscriptEntry:
     timestamp: datetime = field(default_factory=datetime.utcnow)
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentConfig:
     """Configuration for a voice agent session."""
     agent_name: str = "Assistant"
@@ -57,27 +118,41 @@ class VoiceAgent:
         self.stt: Optional[VoskSTT] = stt_service
         self.llm_service: Optional[GeminiLLM] = llm_service
         self.tts: Optional[PiperTTS] = tts_service
+        # Vosk decoding is a blocking C call, so it runs off the event loop. One worker per
+        # session keeps this recognizer's calls in order without queueing behind other sessions
+        self._stt_executor: Optional[ThreadPoolExecutor] = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="vosk"
+        )
         
         self.transcript: list[TranscriptEntry] = []
+        # Formatted views, built once per entry instead of on every status poll
+        self._transcript_lines: list[str] = []
+        self._transcript_json: list[dict] = []
         self.conversation_history: list[dict] = []
+        self._chat: Optional[AsyncChat] = None  # Per-session Gemini chat, opened on first turn
         
         self.room: Optional[rtc.Room] = None
         self.audio_source: Optional[rtc.AudioSource] = None
         self.start_time: Optional[float] = None
         self.is_active = False
         self.is_speaking = False
+        self._tasks: set[asyncio.Task] = set()  # Background work owned by this session
         
-        self._pending_audio: bytes = b""
+        self._pending_audio = bytearray()
         self._vad_silence_threshold = 1.8  # Wait 1.8s of silence before sending to LLM
-        self._last_speech_time: Optional[float] = None
+        self._last_speech_time: Optional[float] = None  # time.monotonic() of last STT activity
         self._speech_buffer: list[str] = []  # Buffer final results from Vosk
-        self._silence_task: Optional[asyncio.Task] = None
-        self._audio_buffer: bytes = b""  # Buffer for accumulating audio chunks
-        self._buffer_size = 8000  # ~0.5 seconds at 16kHz (8000 bytes = 4000 samples)
+        self._utterance_task: Optional[asyncio.Task] = None  # Finalization/response for the last utterance
+        self._audio_buffer = bytearray()  # Buffer for accumulating audio chunks
+        self._buffer_size = 2560  # 80ms at 16kHz - VAD sweep and Vosk feed cadence
         self._silence_count = 0  # Counter for silence logging
+        self._in_speech = False  # VAD state: inside an utterance
+        self._vad_silent_frames = 0  # Consecutive non-speech frames since speech
+        self._response_ready_at: Optional[float] = None  # For first-audio latency logging
         
         # Voice Activity Detection to filter silence
         self.vad = webrtcvad.Vad(2)  # Aggressiveness: 0-3, 2 is balanced
+        self._noise_floor = VAD_INITIAL_NOISE_FLOOR  # Adapted on background (non-utterance) frames
         
         # Only initialize services if not already provided (backward compatibility)
         if self.stt is None or self.llm_service is None or self.tts is None:
@@ -105,20 +180,42 @@ class VoiceAgent:
         )
         
         if self.tts is None:
-            self.tts = PiperTTS(model_path=self.config.piper_model_path)
+            self.tts = PiperTTS(
+                model_path=self.config.piper_model_path,
+                prefer_int8=self.config.piper_prefer_int8
+            )
         
         logger.info("Voice agent services initialized")
 
     async def _send_data_message(self, message: dict) -> None:
         """Send a message via LiveKit data channel."""
+        await self._publish_data(orjson.dumps(message))
+
+    async def _send_stt_message(self, prefix: bytes, text: str) -> None:
+        """Send an STT partial/final message without building a dict per result."""
+        await self._publish_data(prefix + orjson.dumps(text) + b"}")
+
+    async def _publish_data(self, data: bytes) -> None:
+        """Publish raw bytes on the LiveKit data channel."""
         if self.room and self.room.local_participant:
             try:
-                import json
-                data = json.dumps(message).encode('utf-8')
                 await self.room.local_participant.publish_data(data, reliable=True)
             except Exception as e:
                 logger.debug(f"Failed to send data message: {e}")
 
+    def _spawn(self, coro) -> asyncio.Task:
+        """Run a coroutine as a background task tied to this session's lifetime."""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._on_task_done)
+        return task
+
+    def _on_task_done(self, task: asyncio.Task) -> None:
+        """Forget a finished task and log any error it raised."""
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Voice agent task failed: {task.exception()!r}", exc_info=task.exception())
+
     async def start(self, room_name: str, participant_token: str) -> None:
         """Connect to LiveKit room and start processing."""
         self.room_name = room_name  # Store room name for rejoin functionality
@@ -139,13 +236,15 @@ class VoiceAgent:
                 )
             )
             
-            self.audio_source = rtc.AudioSource(22050, 1)
+            self.audio_source = rtc.AudioSource(22050, 1, queue_size_ms=AUDIO_QUEUE_MS)
             track = rtc.LocalAudioTrack.create_audio_track("agent-audio", self.audio_source)
             
             await self.room.local_participant.publish_track(track)
             
             logger.info(f"Voice agent connected to room: {room_name}")
             
+            self._spawn(self._silence_watchdog())
+            
         except Exception as e:
             logger.error(f"Failed to connect to room: {e}")
             self.is_active = False
@@ -163,7 +262,11 @@ class VoiceAgent:
         
         logger.info(f"Subscribed to audio track from {participant.identity}")
         
-        asyncio.create_task(self._process_audio_track(track))
+        self.handle_audio_track(track)
+
+    def handle_audio_track(self, track: rtc.Track) -> None:
+        """Start feeding a remote audio track through the STT pipeline."""
+        self._spawn(self._process_audio_track(track))
 
     async def _process_audio_track(self, track: rtc.Track) -> None:
         """Continuously process audio chunks through STT."""
@@ -182,39 +285,89 @@ class VoiceAgent:
                            f"rate={frame.sample_rate}, channels={frame.num_channels}, "
                            f"buffer size: {len(self._audio_buffer)} bytes")
             
-            # Accumulate audio in buffer
-            audio_bytes = event.frame.data.tobytes()
-            self._audio_buffer += audio_bytes
+            # Accumulate audio in buffer straight from the frame's int16 samples (no bytes copy)
+            self._audio_buffer.extend(memoryview(event.frame.data).cast("B"))
             
             # Process when buffer reaches target size
             if len(self._audio_buffer) >= self._buffer_size:
-                # Use VAD to check if buffer contains speech
-                # VAD requires exactly 320 bytes (20ms at 16kHz)
-                vad_chunk = self._audio_buffer[:320]
-                is_speech = False
-                try:
-                    is_speech = self.vad.is_speech(vad_chunk, 16000)
-                except Exception as e:
-                    logger.warning(f"VAD error: {e}")
-                    is_speech = True  # Process anyway if VAD fails
+                # Sweep every VAD frame; leftover bytes carry over to the next buffer
+                usable = len(self._audio_buffer) - len(self._audio_buffer) % VAD_FRAME_BYTES
+                with memoryview(self._audio_buffer) as view:
+                    speech, speech_ended = self._filter_speech(view[:usable])
+                # View released above, so the bytearray can shrink in place
+                del self._audio_buffer[:usable]
+                
+                self._pending_audio.extend(speech)
                 
-                if is_speech:
-                    await self._process_audio_chunk(self._audio_buffer)
+                # Feed Vosk in 80ms steps while the user talks so partials arrive quickly
+                if len(self._pending_audio) >= self._buffer_size or (speech_ended and self._pending_audio):
+                    await self._process_audio_chunk(bytes(self._pending_audio))
+                    self._pending_audio.clear()
                     self._silence_count = 0  # Reset silence counter
-                else:
+                elif not speech:
                     self._silence_count += 1
                     # Only log silence occasionally to reduce spam
                     if self._silence_count % 50 == 0:
                         logger.debug(f"Silence detected ({self._silence_count} consecutive buffers)")
                 
-                self._audio_buffer = b""  # Clear buffer
+                if speech_ended:
+                    # VAD saw the end of the utterance - no need to wait out the silence timer.
+                    # VAD also fires on noise, so the reply in progress is only cancelled once Vosk returns words
+                    self._utterance_task = self._spawn(self._on_end_of_speech(self._utterance_task))
+
+    def _filter_speech(self, audio: memoryview) -> tuple[bytes, bool]:
+        """
+        Keep only VAD speech frames (plus a short hangover) from 16kHz PCM audio.
+        
+        Returns the speech bytes and whether an utterance ended within this audio.
+        """
+        speech = bytearray()
+        speech_ended = False
+        energies = _frame_energies(audio).tolist()
+        
+        for offset, energy in zip(range(0, len(audio), VAD_FRAME_BYTES), energies):
+            frame = audio[offset:offset + VAD_FRAME_BYTES]
+            
+            # Frames barely above the background can't be speech - skip the webrtcvad call
+            if energy < self._noise_floor * VAD_ENERGY_GATE:
+                is_speech = False
+            else:
+                try:
+                    is_speech = self.vad.is_speech(bytes(frame), 16000)
+                except Exception as e:
+                    logger.warning(f"VAD error: {e}")
+                    is_speech = True  # Process anyway if VAD fails
+            
+            if not is_speech and not self._in_speech:
+                self._noise_floor = max(
+                    VAD_MIN_NOISE_FLOOR,
+                    self._noise_floor + VAD_NOISE_FLOOR_ALPHA * (energy - self._noise_floor)
+                )
+            
+            if is_speech:
+                self._in_speech = True
+                self._vad_silent_frames = 0
+            elif self._in_speech:
+                self._vad_silent_frames += 1
+                if self._vad_silent_frames >= VAD_END_OF_SPEECH_FRAMES:
+                    self._in_speech = False
+                    speech_ended = True
+                if self._vad_silent_frames > VAD_HANGOVER_FRAMES:
+                    continue
+            else:
+                continue
+            
+            speech += frame
+        
+        return bytes(speech), speech_ended
 
     async def _process_audio_chunk(self, audio_chunk: bytes) -> None:
         """Process single audio chunk through speech recognition."""
-        if self.stt is None:
-            return
+        if self.stt is None or self._stt_executor is None:
+            return  # No STT, or the session is already cleaned up
         
-        result = self.stt.transcribe_stream(audio_chunk)
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self._stt_executor, self.stt.transcribe_stream, audio_chunk)
         
         # Check for both partial and final results
         partial_text = result.get("partial", "").strip()
@@ -223,44 +376,89 @@ class VoiceAgent:
         # If we got a final result, use it (Vosk resets after final)
         if final_text:
             self._speech_buffer.append(final_text)
-            self._last_speech_time = time.time()
+            self._last_speech_time = time.monotonic()
             logger.info(f"Speech fragment: {final_text}")
             
             # Send to frontend via data channel
-            await self._send_data_message({"type": "stt_final", "text": final_text})
+            await self._send_stt_message(STT_FINAL_PREFIX, final_text)
             
-            # Reset silence timer - wait for more speech
-            if self._silence_task:
-                self._silence_task.cancel()
-            self._silence_task = asyncio.create_task(self._wait_for_silence())
+            # New speech interrupts any utterance still being handled
+            if self._utterance_task:
+                self._utterance_task.cancel()
         
         # Also track partial results for live updates (but don't log to reduce spam)
         elif partial_text:
-            self._last_speech_time = time.time()
+            self._last_speech_time = time.monotonic()
             # Only send to frontend, don't log every partial
             
             # Send partial to frontend
-            await self._send_data_message({"type": "stt_partial", "text": partial_text})
+            await self._send_stt_message(STT_PARTIAL_PREFIX, partial_text)
             
-            # Reset silence timer
-            if self._silence_task:
-                self._silence_task.cancel()
-            self._silence_task = asyncio.create_task(self._wait_for_silence())
+            if self._utterance_task:
+                self._utterance_task.cancel()
     
-    async def _wait_for_silence(self) -> None:
-        """Wait for silence threshold before finalizing speech."""
+    async def _silence_watchdog(self) -> None:
+        """Finalize buffered speech once STT has been quiet for the silence threshold."""
+        while self.is_active:
+            await asyncio.sleep(SILENCE_POLL_INTERVAL)
+            
+            if not self._speech_buffer or self._last_speech_time is None:
+                continue
+            if self._utterance_task is not None and not self._utterance_task.done():
+                continue  # End-of-speech flush already in progress
+            if time.monotonic() - self._last_speech_time >= self._vad_silence_threshold:
+                self._utterance_task = self._spawn(self._finalize_utterance())
+
+    async def _finalize_utterance(self) -> None:
+        """Finalize buffered speech, stopping quietly if new speech interrupts it."""
+        try:
+            await self._finalize_speech()
+        except asyncio.CancelledError:
+            # New speech detected, response cancelled
+            pass
+
+    async def _on_end_of_speech(self, previous: Optional[asyncio.Task] = None) -> None:
+        """
+        Flush Vosk's final result as soon as VAD detects the end of an utterance.
+        
+        previous is the utterance task this flush replaced; it keeps running unless
+        the flush turns up recognized speech.
+        """
         try:
-            await asyncio.sleep(self._vad_silence_threshold)
-            # Silence threshold reached - finalize buffered speech
-            if self._speech_buffer:
-                full_text = " ".join(self._speech_buffer).strip()
-                self._speech_buffer.clear()
-                if full_text:
-                    await self._on_speech_detected(full_text)
+            final_text = ""
+            if self.stt is not None and self._stt_executor is not None:
+                loop = asyncio.get_running_loop()
+                final_text = await loop.run_in_executor(self._stt_executor, self.stt.get_final_result)
+                final_text = final_text.strip()
+            
+            if not final_text and not self._speech_buffer:
+                # Noise, not words - leave the reply being spoken alone
+                if previous is not None and not previous.done() and self._utterance_task is asyncio.current_task():
+                    self._utterance_task = previous
+                return
+            
+            # New speech interrupts any utterance still being handled
+            if previous is not None:
+                previous.cancel()
+            
+            if final_text:
+                self._speech_buffer.append(final_text)
+                logger.info(f"Speech fragment: {final_text}")
+                await self._send_stt_message(STT_FINAL_PREFIX, final_text)
+            
+            await self._finalize_speech()
         except asyncio.CancelledError:
-            # New speech detected, timer cancelled
+            # New speech detected, finalization cancelled
             pass
 
+    async def _finalize_speech(self) -> None:
+        """Send buffered speech fragments on as one user turn."""
+        if self._speech_buffer:
+            full_text = " ".join(self._speech_buffer).strip()
+            self._speech_buffer.clear()
+            if full_text:
+                await self._on_speech_detected(full_text)
+
     async def _on_speech_detected(self, text: str) -> None:
         """Triggered when user finishes speaking (VAD detected end)."""
         logger.info(f"User said: {text}")
@@ -268,7 +466,7 @@ class VoiceAgent:
         # Send user speech to frontend
         await self._send_data_message({"type": "user_speech", "text": text})
         
-        self.transcript.append(TranscriptEntry(speaker="User", text=text))
+        self._record_transcript("User", text)
         self.conversation_history.append({"speaker": "User", "text": text})
         
         # Debug mode: skip LLM, just echo what was heard
@@ -291,76 +489,142 @@ class VoiceAgent:
         self.is_speaking = False
 
     async def _generate_and_speak(self, user_text: str) -> None:
-        """LLM generates response, TTS synthesizes, stream to room."""
+        """Stream LLM sentences into TTS so playback starts before the response completes."""
         if self.llm_service is None or self.tts is None:
             return
         
         self.is_speaking = True
         
+        sentences: asyncio.Queue[Optional[str]] = asyncio.Queue(maxsize=4)
+        response_parts: list[str] = []
+        producer = asyncio.create_task(
+            self._stream_response(user_text, sentences, response_parts)
+        )
+        
         try:
-            response = await self.llm_service.generate_response(
-                user_text, 
-                self.conversation_history
-            )
-            
-            logger.info(f"Agent response: {response}")
-            
-            self.transcript.append(TranscriptEntry(speaker="Agent", text=response))
-            self.conversation_history.append({"speaker": "Agent", "text": response})
-            
-            async for audio_chunk in self.tts.synthesize_stream(response):
+            while (sentence := await sentences.get()) is not None:
+                # Keep draining after an interruption so the full response is still recorded
                 if not self.is_speaking or not self.is_active:
-                    break
+                    continue
                 
-                if self.audio_source is not None:
-                    await self._send_audio_to_room(audio_chunk)
+                # Raw PCM - no WAV header to build per chunk and parse again here
+                async for audio_chunk in self.tts.synthesize_stream(sentence, format="pcm16"):
+                    if not self.is_speaking or not self.is_active:
+                        break
+                    
+                    if self.audio_source is not None:
+                        await self._send_audio_to_room(audio_chunk, self.tts.output_sample_rate)
+            
+            await producer
+            
+            response = " ".join(response_parts)
+            if response:
+                logger.info(f"Agent response: {response}")
+                self._record_transcript("Agent", response)
+                self.conversation_history.append({"speaker": "Agent", "text": response})
                     
         except Exception as e:
             logger.error(f"Error generating response: {e}")
         finally:
+            if not producer.done():
+                producer.cancel()
             self.is_speaking = False
 
-    async def _send_audio_to_room(self, audio_bytes: bytes) -> None:
-        """Send synthesized audio to LiveKit room."""
+    async def _stream_response(
+        self, 
+        user_text: str, 
+        sentences: asyncio.Queue,
+        response_parts: list[str]
+    ) -> None:
+        """Feed LLM sentences into the TTS queue, ending with a None sentinel."""
+        agent_name = self.agent_config.agent_name
+        agent_knowledge = self.agent_config.agent_knowledge
+        
+        # Only the opening turn is independent of earlier context, so only it is cached
+        opening_turn = len(self.conversation_history) == 1  # Just user_text so far
+        
+        try:
+            cached = None
+            if opening_turn:
+                cached = self.llm_service.get_cached_response(agent_name, agent_knowledge, user_text)
+            
+            if cached is not None:
+                logger.info("Response cache hit, skipping LLM")
+                self._response_ready_at = time.monotonic()
+                response_parts.append(cached)
+                await sentences.put(cached)
+            else:
+                if opening_turn:
+                    # Throwaway greedy chat; the session chat is rebuilt from conversation_history next turn
+                    chat = self.llm_service.start_chat(
+                        agent_name=agent_name,
+                        agent_knowledge=agent_knowledge,
+                        deterministic=True
+                    )
+                else:
+                    # The chat resends its whole history every turn - reopen it on the recent turns once past the cap
+                    if self._chat is None or len(self._chat.get_history()) > self.llm_service.max_history_length:
+                        self._chat = self.llm_service.start_chat(
+                            agent_name=agent_name,
+                            agent_knowledge=agent_knowledge,
+                            history=self.conversation_history[:-1]  # Last entry is user_text
+                        )
+                    chat = self._chat
+                
+                async for sentence in self.llm_service.stream_sentences(user_text, chat=chat):
+                    if not response_parts:
+                        self._response_ready_at = time.monotonic()
+                    response_parts.append(sentence)
+                    await sentences.put(sentence)
+                
+                if opening_turn:
+                    self.llm_service.cache_response(
+                        agent_name, agent_knowledge, user_text, " ".join(response_parts)
+                    )
+        except Exception as e:
+            logger.error(f"Error streaming LLM response: {e}")
+        
+        await sentences.put(None)
+
+    async def _send_audio_to_room(self, audio_bytes: bytes, sample_rate: Optional[int] = None) -> None:
+        """Send synthesized audio to LiveKit room (mono PCM16 at sample_rate, or a WAV blob if no rate is given)."""
         if self.audio_source is None:
             return
         
         try:
-            import numpy as np
-            import io
-            import soundfile as sf
-            
-            # Read WAV data properly using soundfile
-            buffer = io.BytesIO(audio_bytes)
-            audio_data, sample_rate = sf.read(buffer, dtype='int16')
+            if sample_rate is not None:
+                pcm, num_channels = memoryview(audio_bytes), 1
+            else:
+                # Slice frames straight out of the WAV payload - no decode, no per-frame copy
+                pcm, sample_rate, num_channels = _parse_wav(audio_bytes)
             
-            # Convert to mono if stereo
-            if len(audio_data.shape) > 1:
-                audio_data = audio_data[:, 0]
+            # Keep only the first channel if stereo
+            if num_channels > 1:
+                samples = np.frombuffer(pcm, dtype=np.int16)[::num_channels]
+                pcm = memoryview(np.ascontiguousarray(samples)).cast("B")
             
-            # Ensure it's int16
-            audio_array = audio_data.astype(np.int16)
+            chunk_samples = sample_rate * AUDIO_FRAME_MS // 1000
+            chunk_bytes = chunk_samples * 2  # 16-bit = 2 bytes per sample
             
-            # Split into smaller chunks for smoother streaming (20ms chunks)
-            chunk_samples = int(sample_rate * 0.02)  # 20ms chunks
-            
-            for i in range(0, len(audio_array), chunk_samples):
+            for offset in range(0, len(pcm), chunk_bytes):
                 if not self.is_speaking or not self.is_active:
                     break
                     
-                chunk = audio_array[i:i + chunk_samples]
+                chunk = pcm[offset:offset + chunk_bytes]
                 
                 frame = rtc.AudioFrame(
-                    data=chunk.tobytes(),
+                    data=chunk,
                     sample_rate=sample_rate,
                     num_channels=1,
-                    samples_per_channel=len(chunk)
+                    samples_per_channel=len(chunk) // 2
                 )
                 
                 try:
                     await self.audio_source.capture_frame(frame)
-                    # Small delay to prevent overwhelming the buffer
-                    await asyncio.sleep(0.015)
+                    if self._response_ready_at is not None:
+                        latency_ms = (time.monotonic() - self._response_ready_at) * 1000
+                        logger.debug(f"First audio frame captured {latency_ms:.0f}ms after first LLM sentence")
+                        self._response_ready_at = None
                 except Exception as frame_error:
                     logger.warning(f"Error capturing frame: {frame_error}")
                 
@@ -383,34 +647,49 @@ class VoiceAgent:
         
         self._cleanup()
         
+        # Let track readers and in-flight responses unwind before reading the transcript
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        
         return self.get_transcript()
 
     def _cleanup(self) -> None:
         """Release resources and reset state."""
-        if self.stt is not None:
-            self.stt.reset()
-        
+        if self._stt_executor is not None:
+            if self.stt is not None:
+                # Queue behind any in-flight decode rather than racing it
+                self._stt_executor.submit(self.stt.reset)
+            # Worker thread exits once the queued calls finish
+            self._stt_executor.shutdown(wait=False)
+            self._stt_executor = None
+        
+        for task in self._tasks:
+            task.cancel()
+        
+        self._chat = None
         self.room = None
         self.audio_source = None
 
+    def _record_transcript(self, speaker: str, text: str) -> None:
+        """Append a transcript entry and its formatted text/JSON rows."""
+        entry = TranscriptEntry(speaker=speaker, text=text)
+        self.transcript.append(entry)
+        self._transcript_lines.append(
+            f"[{entry.timestamp.strftime('%H:%M:%S')}] {speaker}: {text}"
+        )
+        self._transcript_json.append({
+            "speaker": speaker,
+            "text": text,
+            "timestamp": entry.timestamp.isoformat()
+        })
+
     def get_transcript(self) -> str:
         """Return full conversation text as formatted string."""
-        lines = []
-        for entry in self.transcript:
-            timestamp = entry.timestamp.strftime("%H:%M:%S")
-            lines.append(f"[{timestamp}] {entry.speaker}: {entry.text}")
-        return "\n".join(lines)
+        return "\n".join(self._transcript_lines)
 
     def get_transcript_json(self) -> list[dict]:
         """Return transcript as list of dictionaries."""
-        return [
-            {
-                "speaker": entry.speaker,
-                "text": entry.text,
-                "timestamp": entry.timestamp.isoformat()
-            }
-            for entry in self.transcript
-        ]
+        return list(self._transcript_json)
 
     def get_duration(self) -> int:
         """Return session duration in seconds."""
@@ -428,9 +707,77 @@ class VoiceAgent:
         }
 
 
+# Worker-wide model instances, loaded by the first job and shared by every later one
+_service_cache: dict[str, object] = {}
+_service_lock = asyncio.Lock()
+
+MCL_CURRENT = 1  # mlockall flag from <sys/mman.h>
+
+
+def _lock_process_memory() -> None:
+    """Pin already-loaded model weights in RAM so they are never swapped out (Linux only)."""
+    if not sys.platform.startswith("linux"):
+        logger.warning("Model memory locking is only supported on Linux")
+        return
+    
+    libc = ctypes.CDLL("libc.so.6", use_errno=True)
+    if libc.mlockall(MCL_CURRENT) != 0:
+        errno = ctypes.get_errno()
+        logger.warning(f"mlockall failed (errno {errno}); raise RLIMIT_MEMLOCK to lock model memory")
+    else:
+        logger.info("Model memory locked in RAM")
+
+
+async def _warm_up_services(stt: VoskSTT, llm: GeminiLLM) -> None:
+    """Run one throwaway inference per model so the first caller doesn't pay page-in costs (TTS warms itself on load)."""
+    loop = asyncio.get_running_loop()
+    start = time.monotonic()
+    
+    await llm.warm_up()
+    await loop.run_in_executor(None, stt.transcribe_stream, b"\x00" * 3200)  # 100ms silence
+    await loop.run_in_executor(None, stt.reset)
+    
+    logger.info(f"Services warmed up in {(time.monotonic() - start) * 1000:.0f}ms")
+
+
+async def get_services(config: Config) -> tuple[GeminiLLM, PiperTTS]:
+    """
+    Return the worker's shared LLM and TTS services, loading them once.
+    
+    The Vosk model is loaded and warmed here too, but recognizers hold per-stream
+    state, so each job builds its own VoskSTT on top of the shared model.
+    """
+    async with _service_lock:
+        if not _service_cache:
+            logger.info("Loading shared voice agent services")
+            loop = asyncio.get_running_loop()
+            
+            # Model loading is slow, blocking work - keep it off the event loop
+            stt = await loop.run_in_executor(None, VoskSTT, config.vosk_model_path)
+            _service_cache["llm"] = GeminiLLM(
+                api_key=config.gemini_api_key,
+                model=config.gemini_model
+            )
+            _service_cache["tts"] = await loop.run_in_executor(
+                None, PiperTTS, config.piper_model_path, config.piper_prefer_int8
+            )
+            
+            await _warm_up_services(stt, _service_cache["llm"])
+            
+            if config.mlock_models:
+                _lock_process_memory()
+            
+            logger.info("Shared voice agent services loaded")
+    
+    return _service_cache["llm"], _service_cache["tts"]
+
+
 async def entrypoint(ctx: JobContext) -> None:
     """LiveKit agent entrypoint for worker deployment."""
     config = load_config()
+    llm_service, tts_service = await get_services(config)
+    # Own recognizer for this job; the Vosk model underneath is shared
+    stt_service = await asyncio.get_running_loop().run_in_executor(None, VoskSTT, config.vosk_model_path)
     
     agent_config = AgentConfig(
         agent_name=ctx.job.agent_name or "Assistant",
@@ -438,7 +785,13 @@ async def entrypoint(ctx: JobContext) -> None:
         room_name=ctx.room.name
     )
     
-    voice_agent = VoiceAgent(config, agent_config)
+    voice_agent = VoiceAgent(
+        config, 
+        agent_config,
+        stt_service=stt_service,
+        llm_service=llm_service,
+        tts_service=tts_service
+    )
     
     await ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
     
@@ -448,7 +801,7 @@ async def entrypoint(ctx: JobContext) -> None:
         """Process audio from a participant."""
         for publication in participant.track_publications.values():
             if publication.track and publication.track.kind == rtc.TrackKind.KIND_AUDIO:
-                asyncio.create_task(voice_agent._process_audio_track(publication.track))
+                voice_agent.handle_audio_track(publication.track)
 
     for participant in ctx.room.remote_participants.values():
         await process_participant(participant)
@@ -460,7 +813,7 @@ async def entrypoint(ctx: JobContext) -> None:
         participant: rtc.RemoteParticipant
     ) -> None:
         if track.kind == rtc.TrackKind.KIND_AUDIO:
-            asyncio.create_task(voice_agent._process_audio_track(track))
+            voice_agent.handle_audio_track(track)
 
 
 if __name__ == "__main__":
@@ -1,8 +1,9 @@
 """Configuration loader for voice agent microservice."""
 import os
-from typing import Optional
+from functools import lru_cache
+from typing import Any, Optional
 from pydantic_settings import BaseSettings
-from pydantic import Field, field_validator
+from pydantic import Field, PrivateAttr, field_validator
 
 
 class Config(BaseSettings):
@@ -40,6 +41,11 @@ class Config(BaseSettings):
         alias="PIPER_MODEL_PATH",
         description="Path to Piper TTS model (.onnx file)"
     )
+    piper_prefer_int8: bool = Field(
+        default=True,
+        alias="PIPER_PREFER_INT8",
+        description="Load the int8 quantized copy of the Piper model when setup.py created one"
+    )
     port: int = Field(
         default=8000,
         alias="PORT",
@@ -55,6 +61,13 @@ class Config(BaseSettings):
         alias="CORS_ORIGINS",
         description="Comma-separated CORS allowed origins"
     )
+    mlock_models: bool = Field(
+        default=False,
+        alias="MLOCK_MODELS",
+        description="Lock loaded model memory in RAM (Linux, needs RLIMIT_MEMLOCK)"
+    )
+
+    _cors_origins: tuple[str, ...] = PrivateAttr(default=())
 
     model_config = {
         "env_file": ".env",
@@ -72,13 +85,20 @@ class Config(BaseSettings):
             raise ValueError(f"Invalid log level: {v}. Must be one of {valid_levels}")
         return v.upper()
 
+    def model_post_init(self, __context: Any) -> None:
+        """Split the CORS origins string once, at load time."""
+        self._cors_origins = tuple(
+            origin.strip() for origin in self.cors_origins.split(",") if origin.strip()
+        )
+
     def get_cors_origins_list(self) -> list[str]:
         """Return CORS origins as a list."""
-        return [origin.strip() for origin in self.cors_origins.split(",")]
+        return list(self._cors_origins)
 
 
+@lru_cache(maxsize=1)
 def load_config() -> Config:
-    """Load and validate configuration from environment."""
+    """Load and validate configuration from environment (parsed once per process)."""
     return Config()  # type: ignore
 
 
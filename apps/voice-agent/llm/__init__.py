@@ -1,3 +1,4 @@
 from .gemini_llm import GeminiLLM
+from .response_cache import ResponseCache
 
-__all__ = ["GeminiLLM"]
+__all__ = ["GeminiLLM", "ResponseCache"]
@@ -1,10 +1,14 @@
 """Gemini Flash LLM integration for fast conversational responses."""
 import asyncio
 import logging
-from typing import AsyncGenerator, Optional
+import re
+from functools import lru_cache
+from itertools import islice
+from typing import AsyncGenerator, Iterable, Optional
 
 from google import genai
 from google.genai import types
+from google.genai.chats import AsyncChat
 
 from prompts import (
     VOICE_AGENT_SYSTEM_PROMPT,
@@ -12,15 +16,93 @@ from prompts import (
     ERROR_RESPONSE
 )
 
+from .response_cache import ResponseCache
+
 logger = logging.getLogger(__name__)
 
+# Voice responses are capped at two sentences
+MAX_RESPONSE_SENTENCES = 2
+
+# Sentence boundary inside a streamed response (punctuation followed by whitespace)
+_SENTENCE_END = re.compile(r"[.!?]+\s+")
+
+# Sentence terminator run inside a complete response
+_SENTENCE_SPLIT = re.compile(r"[.!?]+")
+
+# Flush a clause to TTS once this many characters arrive without a sentence end
+_MAX_PENDING_CHARS = 120
+
+# Quota / rate-limit failures that retrying won't fix
+_QUOTA_ERROR = re.compile(r"429|RESOURCE_EXHAUSTED|quota", re.IGNORECASE)
+
+# Spoken when the streaming request fails
+STREAM_ERROR_RESPONSE = "I'm having trouble right now."
+
+# Upper bound for a single Gemini request; a stalled connection falls through to retries
+REQUEST_TIMEOUT_MS = 15_000
+
+# Clients by running event loop, then API key, shared by every GeminiLLM instance created on that loop.
+# Not a WeakKeyDictionary: each client's aiohttp session references its loop, so the keys would never be collected
+_CLIENT_CACHE: dict[asyncio.AbstractEventLoop, dict[str, genai.Client]] = {}
+
+
+@lru_cache(maxsize=128)
+def _render_system_prompt(agent_name: str, agent_knowledge: str) -> str:
+    """Format the system prompt template; repeat agents reuse the rendered text."""
+    return VOICE_AGENT_SYSTEM_PROMPT.format(
+        agent_name=agent_name,
+        agent_knowledge=agent_knowledge or "You can help with general questions"
+    )
+
+
+def _get_client(api_key: str, http_options: Optional[types.HttpOptions] = None) -> genai.Client:
+    """
+    Return the shared client for an API key on the running loop.
+    
+    Custom transport options get a dedicated client, and so does a caller outside a
+    running loop: the SDK's aiohttp session binds to the first loop that uses it and
+    isn't rebuilt once that loop closes, so it can't be shared across asyncio.run calls.
+    """
+    if http_options is not None:
+        return genai.Client(api_key=api_key, http_options=http_options)
+    
+    http_options = types.HttpOptions(timeout=REQUEST_TIMEOUT_MS)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return genai.Client(api_key=api_key, http_options=http_options)
+    
+    clients = _CLIENT_CACHE.get(loop)
+    if clients is None:
+        # First client on this loop - drop those of loops that have closed so their sessions can be freed
+        for stale in [l for l in _CLIENT_CACHE if l.is_closed()]:
+            del _CLIENT_CACHE[stale]
+        clients = _CLIENT_CACHE[loop] = {}
+    
+    client = clients.get(api_key)
+    if client is None:
+        client = genai.Client(api_key=api_key, http_options=http_options)
+        clients[api_key] = client
+    return client
+
 
 class GeminiLLM:
     """Google Gemini Flash integration for conversational AI responses."""
 
-    def __init__(self, api_key: str, model: str = "gemini-2.0-flash"):
-        """Initialize Gemini client with Flash model."""
-        self.client = genai.Client(api_key=api_key)
+    def __init__(
+        self, 
+        api_key: str, 
+        model: str = "gemini-2.0-flash",
+        http_options: Optional[types.HttpOptions] = None
+    ):
+        """
+        Initialize Gemini client with Flash model.
+        
+        Instances using the same API key share one client and its keep-alive HTTP
+        transport. Pass http_options to get a dedicated client with a tuned
+        transport; by default requests time out after REQUEST_TIMEOUT_MS.
+        """
+        self.client = _get_client(api_key, http_options)
         self.model_name = model
         self.generation_config = types.GenerateContentConfig(
             temperature=0.7,
@@ -28,32 +110,84 @@ class GeminiLLM:
             top_p=0.9,
             top_k=40
         )
+        # Cached opening replies must not depend on sampling, so they are generated greedily
+        self.deterministic_config = self.generation_config.model_copy(update={"temperature": 0.0})
         self.system_context = ""
+        self._prompt_prefix = "\n\nConversation:\n"  # Static head of every prompt, rebuilt with the context
         self.max_history_length = 10
-        logger.info(f"Gemini LLM initialized with model: {model}")
+        self.response_cache = ResponseCache()
+        logger.info("Gemini LLM initialized with model: %s", model)
+
+    def _format_system_context(self, agent_name: str, agent_knowledge: str) -> str:
+        """Render the system prompt for an agent."""
+        return _render_system_prompt(agent_name, agent_knowledge)
 
     def set_system_context(self, agent_name: str = "Assistant", agent_knowledge: str = "") -> None:
         """Set agent knowledge/personality as system prompt."""
-        self.system_context = VOICE_AGENT_SYSTEM_PROMPT.format(
-            agent_name=agent_name,
-            agent_knowledge=agent_knowledge or "You can help with general questions"
-        )
-        logger.debug(f"System context set for agent: {agent_name}")
+        self.system_context = self._format_system_context(agent_name, agent_knowledge)
+        self._prompt_prefix = f"{self.system_context}\n\nConversation:\n"
+        logger.debug("System context set for agent: %s", agent_name)
 
-    def _build_prompt(self, user_message: str, conversation_history: list) -> str:
-        """Construct full prompt with system context and history."""
-        prompt_parts = [self.system_context, "\nConversation:"]
+    def start_chat(
+        self, 
+        agent_name: str = "Assistant", 
+        agent_knowledge: str = "",
+        history: Optional[list] = None,
+        deterministic: bool = False
+    ) -> AsyncChat:
+        """
+        Open a stateful chat for one voice session.
         
-        recent_history = conversation_history[-self.max_history_length:]
-        for entry in recent_history:
-            speaker = entry.get("speaker", "User")
-            text = entry.get("text", "")
-            prompt_parts.append(f"{speaker}: {text}")
+        The system prompt travels as a system instruction and each turn is appended
+        to the same history, so consecutive requests share an identical prefix that
+        Gemini can reuse instead of re-reading a rebuilt prompt every turn.
+        Only the last max_history_length entries of history are carried over.
+        Pass deterministic=True for replies that will be cached (temperature 0).
+        """
+        base_config = self.deterministic_config if deterministic else self.generation_config
+        config = base_config.model_copy(
+            update={"system_instruction": self._format_system_context(agent_name, agent_knowledge)}
+        )
+        contents = [
+            types.Content(
+                role="user" if entry.get("speaker", "User") == "User" else "model",
+                parts=[types.Part(text=entry.get("text", ""))]
+            )
+            for entry in (history or [])[-self.max_history_length:]
+        ]
+        return self.client.aio.chats.create(model=self.model_name, config=config, history=contents)
+
+    def get_cached_response(self, agent_name: str, agent_knowledge: str, user_message: str) -> Optional[str]:
+        """
+        Return a previous opening reply to the same question from the same agent, if cached.
         
-        prompt_parts.append(f"User: {user_message}")
-        prompt_parts.append("Assistant:")
+        The cache is shared by every session and keyed without history, so only look up
+        the first user turn of a conversation.
+        """
+        return self.response_cache.get((agent_name, agent_knowledge), user_message)
+
+    def cache_response(self, agent_name: str, agent_knowledge: str, user_message: str, response: str) -> None:
+        """Remember a successful opening reply (generated with deterministic=True) so repeated questions skip the LLM."""
+        if response in (FALLBACK_RESPONSE, ERROR_RESPONSE) or response.endswith(STREAM_ERROR_RESPONSE):
+            return
+        self.response_cache.put((agent_name, agent_knowledge), user_message, response)
+
+    def _recent_history(self, conversation_history: Optional[list]) -> Iterable[dict]:
+        """Last max_history_length turns of the given history (none if not given)."""
+        if conversation_history is None:
+            return ()
+        start = max(0, len(conversation_history) - self.max_history_length)
+        return islice(conversation_history, start, None)
+
+    def _build_prompt(self, user_message: str, conversation_history: Optional[list] = None) -> str:
+        """Construct full prompt with system context and history."""
+        recent_history = self._recent_history(conversation_history)
+        history = "".join(
+            f"{entry.get('speaker', 'User')}: {entry.get('text', '')}\n"
+            for entry in recent_history
+        )
         
-        return "\n".join(prompt_parts)
+        return "".join((self._prompt_prefix, history, "User: ", user_message, "\nAssistant:"))
 
     async def generate_response(
         self, 
@@ -61,15 +195,11 @@ class GeminiLLM:
         conversation_history: Optional[list] = None
     ) -> str:
         """Generate AI response with retry logic."""
-        if conversation_history is None:
-            conversation_history = []
-        
         prompt = self._build_prompt(user_message, conversation_history)
         
         for attempt in range(3):
             try:
-                response = await asyncio.to_thread(
-                    self.client.models.generate_content,
+                response = await self.client.aio.models.generate_content(
                     model=self.model_name,
                     contents=prompt,
                     config=self.generation_config
@@ -79,13 +209,11 @@ class GeminiLLM:
                     text = response.text.strip()
                     
                     # Force truncate if response is too long (safety check)
-                    # Split by sentence and take only first 1-2 sentences
-                    sentences = text.replace('!', '.').replace('?', '.').split('.')
-                    sentences = [s.strip() for s in sentences if s.strip()]
-                    
-                    if len(sentences) > 2:
-                        text = '. '.join(sentences[:2]) + '.'
-                        logger.warning(f"Truncated long response from {len(sentences)} to 2 sentences")
+                    # Stop scanning once the sentence budget is reached and cut after it
+                    ends = list(islice(_SENTENCE_SPLIT.finditer(text), MAX_RESPONSE_SENTENCES))
+                    if len(ends) == MAX_RESPONSE_SENTENCES and text[ends[-1].end():].strip():
+                        text = text[:ends[-1].end()]
+                        logger.warning("Truncated long response to %d sentences", MAX_RESPONSE_SENTENCES)
                     
                     return text
                 
@@ -93,11 +221,10 @@ class GeminiLLM:
                 return FALLBACK_RESPONSE
                 
             except Exception as e:
-                error_str = str(e)
-                logger.error(f"Gemini API error (attempt {attempt + 1}): {e}")
+                logger.error("Gemini API error (attempt %d): %s", attempt + 1, e)
                 
                 # Don't retry on quota/rate limit errors - they won't recover quickly
-                if "429" in error_str or "RESOURCE_EXHAUSTED" in error_str or "quota" in error_str.lower():
+                if _QUOTA_ERROR.search(str(e)):
                     logger.warning("Quota exceeded - not retrying")
                     break
                 
@@ -110,29 +237,81 @@ class GeminiLLM:
     async def stream_response(
         self, 
         user_message: str, 
-        conversation_history: Optional[list] = None
+        conversation_history: Optional[list] = None,
+        chat: Optional[AsyncChat] = None
     ) -> AsyncGenerator[str, None]:
-        """Async generator for streaming response chunks."""
-        if conversation_history is None:
-            conversation_history = []
-        
-        prompt = self._build_prompt(user_message, conversation_history)
-        
+        """Async generator for streaming response chunks, optionally through a session chat."""
         try:
-            # Note: Streaming might work differently with google.genai
-            response = self.client.models.generate_content_stream(
-                model=self.model_name,
-                contents=prompt,
-                config=self.generation_config
-            )
+            if chat is not None:
+                response = await chat.send_message_stream(user_message)
+            else:
+                prompt = self._build_prompt(user_message, conversation_history)
+                response = await self.client.aio.models.generate_content_stream(
+                    model=self.model_name,
+                    contents=prompt,
+                    config=self.generation_config
+                )
             
-            for chunk in response:
+            async for chunk in response:
                 if chunk.text:
                     yield chunk.text
                     
         except Exception as e:
-            logger.error(f"Gemini streaming error: {e}")
-            yield "I'm having trouble right now."
+            logger.error("Gemini streaming error: %s", e)
+            yield STREAM_ERROR_RESPONSE
+
+    async def stream_sentences(
+        self, 
+        user_message: str, 
+        conversation_history: Optional[list] = None,
+        chat: Optional[AsyncChat] = None
+    ) -> AsyncGenerator[str, None]:
+        """Async generator yielding complete sentences as soon as they stream in."""
+        pending = ""
+        sentence_count = 0
+        yielded = False
+        
+        # Keep draining the stream after the sentence cap so the request completes cleanly
+        async for delta in self.stream_response(user_message, conversation_history, chat):
+            if sentence_count >= MAX_RESPONSE_SENTENCES:
+                continue
+            
+            pending += delta
+            while sentence_count < MAX_RESPONSE_SENTENCES:
+                match = _SENTENCE_END.search(pending)
+                if match:
+                    end = match.end()
+                    sentence_count += 1
+                elif len(pending) > _MAX_PENDING_CHARS and " " in pending:
+                    # Long clause without punctuation - hand it to TTS up to the last word
+                    end = pending.rindex(" ") + 1
+                else:
+                    break
+                
+                chunk = pending[:end].strip()
+                pending = pending[end:]
+                if chunk:
+                    yielded = True
+                    yield chunk
+        
+        if sentence_count < MAX_RESPONSE_SENTENCES and pending.strip():
+            yielded = True
+            yield pending.strip()
+        
+        if not yielded:
+            logger.warning("Empty streamed response from Gemini")
+            yield FALLBACK_RESPONSE
+
+    async def warm_up(self) -> None:
+        """Open the pooled connection with a one-token request so the first user turn doesn't pay for it."""
+        try:
+            await self.client.aio.models.generate_content(
+                model=self.model_name,
+                contents="ping",
+                config=types.GenerateContentConfig(max_output_tokens=1)
+            )
+        except Exception as e:
+            logger.warning("Gemini warm-up failed: %s", e)
 
     def is_ready(self) -> bool:
         """Check if the LLM service is ready."""
@@ -0,0 +1,70 @@
+"""Bounded in-process cache of LLM responses for repeated user questions."""
+import re
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_utterance(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so rephrasings of case/punctuation match."""
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub("", text.lower())).strip()
+
+
+class ResponseCache:
+    """LRU cache with TTL mapping (scope, normalized utterance) to a response."""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600.0, min_words: int = 3):
+        """
+        Create an empty cache.
+
+        Args:
+            max_entries: Least recently used entries are evicted beyond this size
+            ttl_seconds: Entries older than this are treated as missing
+            min_words: Shorter utterances ("yes", "okay") depend on context and are never cached
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.min_words = min_words
+        self._entries: OrderedDict[tuple, tuple[float, str]] = OrderedDict()
+
+    def _key(self, scope: Hashable, utterance: str) -> Optional[tuple]:
+        """Build the cache key, or None if the utterance is too short to cache."""
+        normalized = normalize_utterance(utterance)
+        if len(normalized.split(" ")) < self.min_words:
+            return None
+        return (scope, normalized)
+
+    def get(self, scope: Hashable, utterance: str) -> Optional[str]:
+        """Return the cached response for an utterance, if present and fresh."""
+        key = self._key(scope, utterance)
+        if key is None:
+            return None
+
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        stored_at, response = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return response
+
+    def put(self, scope: Hashable, utterance: str, response: str) -> None:
+        """Store a response, evicting the least recently used entry when full."""
+        key = self._key(scope, utterance)
+        if key is None:
+            return
+
+        self._entries[key] = (time.monotonic(), response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
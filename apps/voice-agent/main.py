@@ -2,17 +2,17 @@
 import asyncio
 import logging
 import os
+import secrets
 import sys
 import time
-import uuid
 from contextlib import asynccontextmanager
 from typing import Optional
 
 from fastapi import FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from livekit import api
 
 from config import Config, load_config, validate_config
@@ -28,10 +28,25 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+STATIC_DIR = os.path.join(os.path.dirname(__file__), "static")
+
 config: Optional[Config] = None
 active_sessions: dict[str, VoiceAgent] = {}
+# Summaries served by /sessions; updated on start/end and refreshed in the background
+_sessions_snapshot: dict[str, dict] = {}
+_sessions_lock = asyncio.Lock()  # Serializes snapshot writers across the refresh task and handlers
+SESSION_SNAPSHOT_INTERVAL = 5.0  # Seconds between snapshot refreshes
 services_status = {"stt": False, "llm": False, "tts": False}
 
+# Room grants shared by every token; only the room name differs per session
+_USER_GRANTS = {
+    "room_join": True,
+    "can_publish": True,
+    "can_subscribe": True,
+    "can_publish_data": True
+}
+_AGENT_GRANTS = {**_USER_GRANTS, "agent": True}
+
 # Global service instances (loaded once at startup)
 stt_service: Optional[VoskSTT] = None
 llm_service: Optional[GeminiLLM] = None
@@ -47,6 +62,8 @@ class StartSessionRequest(BaseModel):
 
 class StartSessionResponse(BaseModel):
     """Response after starting a voice session."""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+    
     room_name: str
     participant_token: str
     agent_token: str
@@ -55,6 +72,8 @@ class StartSessionResponse(BaseModel):
 
 class SessionStatusResponse(BaseModel):
     """Response with session status information."""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+    
     active: bool
     duration_seconds: int
     partial_transcript: str
@@ -62,6 +81,8 @@ class SessionStatusResponse(BaseModel):
 
 class EndSessionResponse(BaseModel):
     """Response after ending a voice session."""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+    
     success: bool
     transcript: str
     duration: int
@@ -69,6 +90,8 @@ class EndSessionResponse(BaseModel):
 
 class RejoinTokenResponse(BaseModel):
     """Response for rejoin token request."""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+    
     participant_token: str
     room_name: str
     session_id: str
@@ -76,6 +99,8 @@ class RejoinTokenResponse(BaseModel):
 
 class HealthResponse(BaseModel):
     """Response for health check endpoint."""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+    
     status: str
     services: dict[str, bool]
 
@@ -97,27 +122,59 @@ def generate_livekit_token(
     token.with_identity(participant_identity)
     token.with_name(participant_identity)
     
-    grants = api.VideoGrants(
-        room_join=True,
-        room=room_name,
-        can_publish=True,
-        can_subscribe=True,
-        can_publish_data=True
-    )
-    
-    if is_agent:
-        grants.agent = True
-    
+    grants = api.VideoGrants(room=room_name, **(_AGENT_GRANTS if is_agent else _USER_GRANTS))
     token.with_grants(grants)
     
     return token.to_jwt()
 
 
+def _session_summary(session_id: str, agent: VoiceAgent) -> dict:
+    """Build the /sessions entry for one agent."""
+    status_info = agent.get_status()
+    return {
+        "session_id": session_id,
+        "room_name": agent.agent_config.room_name,
+        "agent_name": agent.agent_config.agent_name,
+        "active": status_info["active"],
+        "duration_seconds": status_info["duration_seconds"]
+    }
+
+
+async def _refresh_sessions_snapshot() -> None:
+    """Periodically refresh session durations/state so /sessions never scans agents."""
+    while True:
+        await asyncio.sleep(SESSION_SNAPSHOT_INTERVAL)
+        async with _sessions_lock:
+            _sessions_snapshot.clear()
+            _sessions_snapshot.update(
+                (session_id, _session_summary(session_id, agent))
+                for session_id, agent in active_sessions.items()
+            )
+
+
+async def _update_session_snapshot(session_id: str) -> None:
+    """Refresh one session's /sessions entry, or drop it once the session is gone."""
+    async with _sessions_lock:
+        agent = active_sessions.get(session_id)
+        if agent is None:
+            _sessions_snapshot.pop(session_id, None)
+        else:
+            _sessions_snapshot[session_id] = _session_summary(session_id, agent)
+
+
+async def _start_agent(session_id: str, agent: VoiceAgent, room_name: str, agent_token: str) -> None:
+    """Connect a session's agent, then publish its new state instead of waiting for the next refresh."""
+    try:
+        await agent.start(room_name, agent_token)
+    finally:
+        await _update_session_snapshot(session_id)
+
+
 def check_services() -> dict[str, bool]:
     """Verify all services are operational."""
     global services_status, stt_service, llm_service, tts_service
     
-    # Check if services are actually loaded
+    # In-memory checks only - model files are probed once at startup, not per request
     services_status["stt"] = stt_service is not None
     services_status["llm"] = llm_service is not None
     services_status["tts"] = tts_service is not None
@@ -137,7 +194,7 @@ async def lifespan(app: FastAPI):
         validate_config(config)
         logger.info("Configuration loaded successfully")
     except Exception as e:
-        logger.error(f"Configuration error: {e}")
+        logger.error("Configuration error: %s", e)
         sys.exit(1)
     
     # Load models once at startup (takes ~51 seconds, but only happens once)
@@ -150,17 +207,21 @@ async def lifespan(app: FastAPI):
         
         logger.info("Initializing Gemini LLM...")
         llm_service = GeminiLLM(config.gemini_api_key, config.gemini_model)
+        await llm_service.warm_up()  # Connect now rather than on the first user turn
         services_status["llm"] = True
         logger.info("✓ Gemini LLM initialized")
         
         logger.info("Loading Piper TTS model...")
-        tts_service = PiperTTS(model_path=config.piper_model_path)
+        tts_service = PiperTTS(
+            model_path=config.piper_model_path,
+            prefer_int8=config.piper_prefer_int8
+        )
         services_status["tts"] = True
         logger.info("✓ Piper TTS loaded")
         
         logger.info("🚀 All models loaded! Voice agent ready for instant session starts.")
     except Exception as e:
-        logger.error(f"Failed to load AI models: {e}")
+        logger.error("Failed to load AI models: %s", e)
         import traceback
         logger.error(traceback.format_exc())
         sys.exit(1)
@@ -168,30 +229,36 @@ async def lifespan(app: FastAPI):
     log_level = getattr(logging, config.log_level, logging.INFO)
     logging.getLogger().setLevel(log_level)
     
-    if not os.path.exists(config.vosk_model_path):
-        logger.warning(f"Vosk model not found at {config.vosk_model_path}")
+    if not os.path.isdir(config.vosk_model_path):
+        logger.warning("Vosk model not found at %s", config.vosk_model_path)
         logger.info("Run 'python setup.py' to download the model")
     
     check_services()
-    logger.info(f"Services status: {services_status}")
+    logger.info("Services status: %s", services_status)
+    
+    snapshot_task = asyncio.create_task(_refresh_sessions_snapshot())
     
     yield
     
     logger.info("Shutting down Voice Agent Service")
     
+    snapshot_task.cancel()
+    
     for session_id, agent in list(active_sessions.items()):
         try:
             await agent.stop()
         except Exception as e:
-            logger.error(f"Error stopping session {session_id}: {e}")
+            logger.error("Error stopping session %s: %s", session_id, e)
     
     active_sessions.clear()
+    _sessions_snapshot.clear()
 
 
 app = FastAPI(
     title="Voice Agent Service",
     description="Real-time voice agent microservice using LiveKit, Vosk, Gemini, and Coqui TTS",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -211,13 +278,13 @@ async def start_session(request: StartSessionRequest) -> StartSessionResponse:
             detail="STT service unavailable. Run 'python setup.py' to download models."
         )
     
-    room_name = request.room_name or f"voice-session-{uuid.uuid4().hex[:8]}"
-    session_id = str(uuid.uuid4())
+    room_name = request.room_name or f"voice-session-{secrets.token_hex(4)}"
+    session_id = secrets.token_hex(16)
     
     try:
         participant_token = generate_livekit_token(
             room_name=room_name,
-            participant_identity=f"user-{uuid.uuid4().hex[:8]}",
+            participant_identity=f"user-{secrets.token_hex(4)}",
             is_agent=False
         )
         
@@ -235,22 +302,24 @@ async def start_session(request: StartSessionRequest) -> StartSessionResponse:
         )
         
         if agent_config.debug_mode:
-            logger.info(f"Starting session in DEBUG MODE (no LLM calls)")
+            logger.info("Starting session in DEBUG MODE (no LLM calls)")
         
-        # Pass pre-loaded services for instant startup
+        # Pass pre-loaded services for instant startup. Recognizers keep per-stream
+        # state, so each session gets its own on top of the already loaded Vosk model
         voice_agent = VoiceAgent(
             config, 
             agent_config,
-            stt_service=stt_service,
+            stt_service=VoskSTT(config.vosk_model_path) if stt_service is not None else None,
             llm_service=llm_service,
             tts_service=tts_service
         )
         
-        asyncio.create_task(voice_agent.start(room_name, agent_token))
-        
         active_sessions[session_id] = voice_agent
+        await _update_session_snapshot(session_id)
         
-        logger.info(f"Session started: {session_id} in room {room_name}")
+        asyncio.create_task(_start_agent(session_id, voice_agent, room_name, agent_token))
+        
+        logger.info("Session started: %s in room %s", session_id, room_name)
         
         return StartSessionResponse(
             room_name=room_name,
@@ -260,7 +329,7 @@ async def start_session(request: StartSessionRequest) -> StartSessionResponse:
         )
         
     except Exception as e:
-        logger.error(f"Failed to start session: {e}")
+        logger.error("Failed to start session: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to start session: {str(e)}"
@@ -308,8 +377,9 @@ async def end_session(session_id: str) -> EndSessionResponse:
         duration = agent.get_duration()
         
         del active_sessions[session_id]
+        await _update_session_snapshot(session_id)
         
-        logger.info(f"Session ended: {session_id}")
+        logger.info("Session ended: %s", session_id)
         
         return EndSessionResponse(
             success=True,
@@ -318,10 +388,11 @@ async def end_session(session_id: str) -> EndSessionResponse:
         )
         
     except Exception as e:
-        logger.error(f"Error ending session {session_id}: {e}")
+        logger.error("Error ending session %s: %s", session_id, e)
         
         if session_id in active_sessions:
             del active_sessions[session_id]
+        await _update_session_snapshot(session_id)
         
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -342,10 +413,10 @@ async def get_rejoin_token(session_id: str) -> RejoinTokenResponse:
     room_name = agent.room_name
     
     # Generate new participant token
-    participant_id = f"user_{uuid.uuid4().hex[:8]}"
+    participant_id = f"user_{secrets.token_hex(4)}"
     participant_token = generate_livekit_token(room_name, participant_id, is_agent=False)
     
-    logger.info(f"Generated rejoin token for session {session_id}, room {room_name}")
+    logger.info("Generated rejoin token for session %s, room %s", session_id, room_name)
     
     return RejoinTokenResponse(
         participant_token=participant_token,
@@ -369,32 +440,17 @@ async def health_check() -> HealthResponse:
 
 @app.get("/sessions")
 async def list_sessions() -> dict:
-    """List all active sessions."""
-    sessions = []
-    for session_id, agent in active_sessions.items():
-        status_info = agent.get_status()
-        sessions.append({
-            "session_id": session_id,
-            "room_name": agent.agent_config.room_name,
-            "agent_name": agent.agent_config.agent_name,
-            "active": status_info["active"],
-            "duration_seconds": status_info["duration_seconds"]
-        })
-    
-    return {"sessions": sessions, "count": len(sessions)}
+    """List all active sessions (durations may lag by up to SESSION_SNAPSHOT_INTERVAL)."""
+    return {"sessions": list(_sessions_snapshot.values()), "count": len(_sessions_snapshot)}
 
 
 # ============================================================================
 # STT Test Page
 # ============================================================================
 
-@app.get("/test")
-async def serve_test_page():
-    """Serve the STT test page."""
-    test_html_path = os.path.join(os.path.dirname(__file__), "static", "test.html")
-    if os.path.exists(test_html_path):
-        return FileResponse(test_html_path, media_type="text/html")
-    return {"error": "Test page not found"}
+# Served by the ASGI static file handler; /test redirects to /test/ (static/index.html)
+if os.path.isdir(STATIC_DIR):
+    app.mount("/test", StaticFiles(directory=STATIC_DIR, html=True), name="test")
 
 
 def setup_cors(app: FastAPI, config: Config) -> None:
@@ -413,13 +469,26 @@ def setup_cors(app: FastAPI, config: Config) -> None:
 if __name__ == "__main__":
     import uvicorn
     
-    temp_config = load_config()
-    setup_cors(app, temp_config)
-    
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=temp_config.port,
-        reload=True,
-        log_level=temp_config.log_level.lower()
-    )
+    config = load_config()
+    setup_cors(app, config)
+    
+    if os.environ.get("DEV"):
+        # Auto-reload for local development
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=config.port,
+            reload=True,
+            log_level=config.log_level.lower()
+        )
+    else:
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=config.port,
+            loop="asyncio" if sys.platform == "win32" else "uvloop",  # uvloop has no Windows build
+            http="httptools",
+            # Sessions and loaded models live in process memory - only scale out behind sticky routing
+            workers=int(os.environ.get("WEB_CONCURRENCY", 1)),
+            log_level=config.log_level.lower()
+        )
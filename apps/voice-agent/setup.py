@@ -1,12 +1,22 @@
 """Setup script to download required ML models on first run."""
+import hashlib
+import importlib.util
+import json
 import logging
 import os
+import re
+import shutil
 import sys
+import tempfile
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import BinaryIO, Optional, Union
 
 import requests
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
+from urllib3.util.retry import Retry
 
 logging.basicConfig(
     level=logging.INFO,
@@ -21,48 +31,150 @@ PIPER_MODEL_URL = "https://huggingface.co/rhasspy/piper-voices/resolve/v1.0.0/en
 PIPER_CONFIG_URL = "https://huggingface.co/rhasspy/piper-voices/resolve/v1.0.0/en/en_US/lessac/medium/en_US-lessac-medium.onnx.json"
 PIPER_MODEL_NAME = "en_US-lessac-medium.onnx"
 PIPER_CONFIG_NAME = "en_US-lessac-medium.onnx.json"
+PIPER_INT8_MODEL_NAME = "en_US-lessac-medium.int8.onnx"
 MODELS_DIR = Path(__file__).parent / "models"
+DOWNLOAD_TIMEOUT = (5, 30)  # (connect, read) seconds
+DOWNLOAD_CHUNK_BYTES = 1 << 20  # 1 MiB reads/writes keep Python loop overhead negligible
+ZIP_SPOOL_MAX_BYTES = 128 << 20  # Archives up to this size are extracted straight from memory
 
+# Pinned SHA-256 digests by file name. Files listed here must match or setup fails;
+# unlisted files are accepted and their digest is logged so it can be pinned
+MODEL_CHECKSUMS: dict[str, str] = {
+    PIPER_CONFIG_NAME: "efe19c417bed055f2d69908248c6ba650fa135bc868b0e6abb3da181dab690a0",
+}
 
-def download_file(url: str, dest_path: Path, description: str = "Downloading") -> None:
-    """Download file with progress bar."""
-    response = requests.get(url, stream=True)
-    response.raise_for_status()
-    
-    total_size = int(response.headers.get("content-length", 0))
-    
-    with open(dest_path, "wb") as f:
+# Written into an extracted model directory last; holds the archive's sha256
+MODEL_MARKER_NAME = ".ok"
+
+# Present in every Vosk model; used to accept manual installs that have no marker
+VOSK_REQUIRED_PATHS = ("am/final.mdl", "conf/model.conf", "graph")
+
+ENV_REQUIRED_VARS = ("LIVEKIT_API_KEY", "LIVEKIT_API_SECRET", "GEMINI_API_KEY")
+
+# "NAME = value" lines for the required variables, matched in one pass over .env
+_ENV_ASSIGNMENT = re.compile(
+    rf"^[ \t]*({'|'.join(ENV_REQUIRED_VARS)})[ \t]*=[ \t]*(.*)$",
+    re.MULTILINE
+)
+
+# One pooled session for all downloads - files from the same host reuse the connection
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+))
+
+
+def download_to(url: str, f: BinaryIO, description: str = "Downloading", offset: int = 0) -> None:
+    """
+    Stream a download into an open binary file with progress bar.
+    
+    With a non-zero offset, f already holds that many bytes of the file and only the
+    rest is requested (HTTP Range). If the server ignores the range, f is rewritten.
+    """
+    headers = {"Range": f"bytes={offset}-"} if offset else None
+    
+    with _SESSION.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT, headers=headers) as response:
+        if offset and response.status_code == 416:
+            return  # Range starts at the end - the earlier attempt already got everything
+        response.raise_for_status()
+        
+        if offset and response.status_code != 206:
+            logger.info(f"{description}: server ignored resume request, restarting download")
+            f.seek(0)
+            f.truncate()
+            offset = 0
+        
+        total_size = offset + int(response.headers.get("content-length", 0))
+        
         with tqdm(
             total=total_size, 
+            initial=offset,
             unit="B", 
             unit_scale=True, 
             desc=description,
             ncols=80
         ) as pbar:
-            for chunk in response.iter_content(chunk_size=8192):
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES):
                 f.write(chunk)
                 pbar.update(len(chunk))
 
 
-def extract_zip(zip_path: Path, extract_to: Path) -> None:
-    """Extract zip archive with progress."""
-    logger.info(f"Extracting {zip_path.name}")
+def sha256_of(f: BinaryIO) -> str:
+    """Hash a binary file object from the start, leaving it positioned at the end."""
+    f.seek(0)
+    digest = hashlib.sha256()
+    while block := f.read(DOWNLOAD_CHUNK_BYTES):
+        digest.update(block)
+    return digest.hexdigest()
+
+
+def verify_checksum(f: BinaryIO, name: str) -> str:
+    """Check a downloaded file against MODEL_CHECKSUMS and return its digest; ValueError on mismatch."""
+    digest = sha256_of(f)
+    expected: Optional[str] = MODEL_CHECKSUMS.get(name)
     
-    with zipfile.ZipFile(zip_path, "r") as zip_ref:
-        members = zip_ref.namelist()
-        with tqdm(total=len(members), desc="Extracting", ncols=80) as pbar:
-            for member in members:
-                zip_ref.extract(member, extract_to)
-                pbar.update(1)
+    if expected is None:
+        logger.info(f"{name} sha256: {digest} (not pinned)")
+    elif digest != expected:
+        raise ValueError(f"Checksum mismatch for {name}: expected {expected}, got {digest}")
+    
+    return digest
+
+
+def download_file(url: str, dest_path: Path, description: str = "Downloading") -> None:
+    """Download file with progress bar, resuming an interrupted earlier attempt."""
+    # Written under a .part name so an interrupted download never looks like a model
+    part_path = dest_path.with_name(dest_path.name + ".part")
+    offset = part_path.stat().st_size if part_path.exists() else 0
+    
+    with open(part_path, "ab", buffering=DOWNLOAD_CHUNK_BYTES) as f:
+        download_to(url, f, description, offset)
+    
+    try:
+        with open(part_path, "rb") as f:
+            verify_checksum(f, dest_path.name)
+    except ValueError:
+        part_path.unlink()  # Corrupt - don't resume from it next time
+        raise
+    
+    part_path.replace(dest_path)
+
+
+def extract_zip(archive: Union[Path, BinaryIO], extract_to: Path) -> None:
+    """Extract zip archive (a path or a seekable file object)."""
+    if isinstance(archive, Path):
+        # A large buffer keeps the central directory scan and member reads from seeking in 8 KiB steps
+        with open(archive, "rb", buffering=DOWNLOAD_CHUNK_BYTES) as fh:
+            extract_zip(fh, extract_to)
+        return
+    
+    logger.info(f"Extracting archive into {extract_to}")
+    
+    # Model archives sit near the 4 GiB / 65k-entry limits where ZIP64 records appear
+    with zipfile.ZipFile(archive, "r", allowZip64=True) as zip_ref:
+        zip_ref.extractall(extract_to)
 
 
 def setup_vosk_model() -> bool:
     """Download and setup Vosk speech recognition model."""
     model_path = MODELS_DIR / VOSK_MODEL_NAME
-    
-    if model_path.exists():
-        logger.info(f"✓ Vosk model already exists at {model_path}")
-        return True
+    archive_name = f"{VOSK_MODEL_NAME}.zip"
+    marker_path = model_path / MODEL_MARKER_NAME
+    
+    # Warm start: the marker is only written after a complete extraction, so no network is needed
+    if marker_path.exists():
+        expected = MODEL_CHECKSUMS.get(archive_name)
+        if expected is None or marker_path.read_text().strip() == expected:
+            logger.info(f"✓ Vosk model already exists at {model_path}")
+            return True
+        logger.warning(f"Vosk model at {model_path} came from a different archive, reinstalling")
+    elif model_path.exists():
+        if all((model_path / p).exists() for p in VOSK_REQUIRED_PATHS):
+            logger.info(f"✓ Vosk model already exists at {model_path} (installed manually)")
+            return True
+        logger.warning(f"Vosk model at {model_path} is incomplete, reinstalling")
     
     logger.info("Setting up Vosk speech recognition model...")
     logger.info(f"Model: {VOSK_MODEL_NAME}")
@@ -71,17 +183,18 @@ def setup_vosk_model() -> bool:
     
     MODELS_DIR.mkdir(parents=True, exist_ok=True)
     
-    zip_path = MODELS_DIR / f"{VOSK_MODEL_NAME}.zip"
-    
     try:
         logger.info(f"Downloading from {VOSK_MODEL_URL}")
-        download_file(VOSK_MODEL_URL, zip_path, "Vosk Model")
-        
-        extract_zip(zip_path, MODELS_DIR)
-        
-        zip_path.unlink()
+        # Keep the archive in memory (spilling to a temp file only if it is unexpectedly
+        # large) and extract from there - no zip is written to models/ and read back
+        with tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_MAX_BYTES) as archive:
+            download_to(VOSK_MODEL_URL, archive, "Vosk Model")
+            digest = verify_checksum(archive, archive_name)
+            archive.seek(0)
+            extract_zip(archive, MODELS_DIR)  # Overwrites whatever a partial run left behind
         
         if model_path.exists():
+            marker_path.write_text(digest)
             logger.info(f"✓ Vosk model ready at {model_path}")
             return True
         else:
@@ -93,8 +206,6 @@ def setup_vosk_model() -> bool:
         return False
     except zipfile.BadZipFile as e:
         logger.error(f"Invalid zip file: {e}")
-        if zip_path.exists():
-            zip_path.unlink()
         return False
     except Exception as e:
         logger.error(f"Setup failed: {e}")
@@ -127,13 +238,15 @@ def setup_piper_tts() -> bool:
     piper_dir.mkdir(parents=True, exist_ok=True)
     
     try:
-        # Download model file
-        logger.info(f"Downloading model from Hugging Face...")
-        download_file(PIPER_MODEL_URL, model_path, "Piper Model")
-        
-        # Download config file
-        logger.info(f"Downloading config...")
-        download_file(PIPER_CONFIG_URL, config_path, "Piper Config")
+        # Download model and config side by side
+        logger.info(f"Downloading model and config from Hugging Face...")
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            downloads = [
+                pool.submit(download_file, PIPER_MODEL_URL, model_path, "Piper Model"),
+                pool.submit(download_file, PIPER_CONFIG_URL, config_path, "Piper Config"),
+            ]
+            for download in downloads:
+                download.result()  # Re-raise any download error
         
         if model_path.exists() and config_path.exists():
             logger.info(f"✓ Piper TTS model ready at {model_path}")
@@ -150,6 +263,70 @@ def setup_piper_tts() -> bool:
         return False
 
 
+def _check_piper_model(model_path: Path, config_path: Path) -> None:
+    """Load a Piper model on the CPU provider and synthesize one sentence, raising if it can't."""
+    import onnxruntime as ort
+    from piper import PiperVoice
+    from piper.config import PiperConfig
+    
+    session = ort.InferenceSession(str(model_path), providers=["CPUExecutionProvider"])
+    config = PiperConfig.from_dict(json.loads(config_path.read_text(encoding="utf-8")))
+    voice = PiperVoice(session=session, config=config)
+    
+    if not any(chunk.audio_int16_bytes for chunk in voice.synthesize("Testing the quantized voice.")):
+        raise RuntimeError("quantized model produced no audio")
+
+
+def quantize_piper_model() -> bool:
+    """Create an int8 dynamically quantized copy of the Piper model (optional)."""
+    piper_dir = MODELS_DIR / "piper"
+    model_path = piper_dir / PIPER_MODEL_NAME
+    int8_path = piper_dir / PIPER_INT8_MODEL_NAME
+    int8_config_path = int8_path.with_suffix(".onnx.json")
+    
+    if int8_path.exists() and int8_config_path.exists():
+        logger.info(f"✓ Quantized Piper model already exists at {int8_path}")
+        return True
+    
+    if not model_path.exists():
+        logger.warning("Piper model not found, skipping quantization")
+        return False
+    
+    try:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+    except ImportError:
+        logger.info("onnxruntime quantization tools not installed, skipping int8 model")
+        return False
+    
+    logger.info("Quantizing Piper model weights to int8...")
+    
+    try:
+        # Only MatMul/Gemm - int8 Conv weights become ConvInteger, which the CPU provider can't run
+        quantize_dynamic(
+            str(model_path),
+            str(int8_path),
+            op_types_to_quantize=["MatMul", "Gemm"],
+            weight_type=QuantType.QInt8
+        )
+        # Piper looks for the config next to the model it loads
+        shutil.copyfile(piper_dir / PIPER_CONFIG_NAME, int8_config_path)
+        
+        # Don't leave behind a model the service would pick up but fail to run
+        _check_piper_model(int8_path, int8_config_path)
+        
+        logger.info(f"✓ Quantized Piper model ready at {int8_path}")
+        logger.info("  It is loaded automatically; set PIPER_PREFER_INT8=false to keep full precision")
+        logger.info("  (listen to a few utterances first - int8 can slightly change the voice)")
+        return True
+        
+    except Exception as e:
+        logger.error(f"Quantization failed: {e}")
+        for path in (int8_path, int8_config_path):
+            if path.exists():
+                path.unlink()
+        return False
+
+
 def verify_dependencies() -> bool:
     """Check that required Python packages are installed."""
     logger.info("Verifying dependencies...")
@@ -164,13 +341,19 @@ def verify_dependencies() -> bool:
     
     missing = []
     
+    # find_spec only locates the package - importing TTS would pull in torch just for this check
     for module, name in required_packages:
         try:
-            __import__(module)
-            logger.info(f"  ✓ {name}")
-        except ImportError:
+            spec = importlib.util.find_spec(module)
+        except ModuleNotFoundError:
+            spec = None  # Parent package of a dotted name is missing
+        
+        if spec is None:
             logger.warning(f"  ✗ {name} not found")
             missing.append(name)
+            continue
+        
+        logger.info(f"  ✓ {name}")
     
     if missing:
         logger.error(f"Missing packages: {', '.join(missing)}")
@@ -193,15 +376,14 @@ def check_env_file() -> bool:
     
     logger.info("✓ .env file exists")
     
-    required_vars = ["LIVEKIT_API_KEY", "LIVEKIT_API_SECRET", "GEMINI_API_KEY"]
-    
     with open(env_path, "r") as f:
         content = f.read()
     
-    missing_vars = []
-    for var in required_vars:
-        if var not in content or f"{var}=your_" in content or f"{var}=" not in content:
-            missing_vars.append(var)
+    found = {m.group(1): m.group(2).strip() for m in _ENV_ASSIGNMENT.finditer(content)}
+    missing_vars = [
+        var for var in ENV_REQUIRED_VARS
+        if not found.get(var) or found[var].startswith("your_")
+    ]
     
     if missing_vars:
         logger.warning(f"Missing or placeholder values in .env: {', '.join(missing_vars)}")
@@ -212,6 +394,14 @@ def check_env_file() -> bool:
 
 def main() -> int:
     """Run setup for voice agent microservice."""
+    try:
+        return run_setup()
+    finally:
+        _SESSION.close()
+
+
+def run_setup() -> int:
+    """Run each setup step and report overall success."""
     logger.info("=" * 60)
     logger.info("Voice Agent Setup")
     logger.info("=" * 60)
@@ -225,23 +415,31 @@ def main() -> int:
         all_success = False
     
     print()
-    logger.info("Step 2: Setting up Vosk STT model")
-    if not setup_vosk_model():
-        logger.error("Vosk model setup failed")
-        all_success = False
+    logger.info("Steps 2-3: Setting up Vosk STT and Piper TTS models (in parallel)")
+    # Independent downloads from different hosts - overlap them instead of running back to back
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        vosk_setup = pool.submit(setup_vosk_model)
+        piper_setup = pool.submit(setup_piper_tts)
+        
+        if not vosk_setup.result():
+            logger.error("Vosk model setup failed")
+            all_success = False
+        
+        if not piper_setup.result():
+            logger.error("Piper TTS model setup failed")
+            all_success = False
     
     print()
-    logger.info("Step 3: Setting up Piper TTS model")
-    if not setup_piper_tts():
-        logger.error("Piper TTS model setup failed")
-        all_success = False
+    logger.info("Step 4: Quantizing Piper TTS model (optional)")
+    if not quantize_piper_model():
+        logger.warning("Skipped int8 Piper model - the full-precision model will be used")
     
     print()
-    logger.info("Step 4: Coqui TTS setup info (alternative)")
+    logger.info("Step 5: Coqui TTS setup info (alternative)")
     setup_coqui_tts()
     
     print()
-    logger.info("Step 5: Checking environment configuration")
+    logger.info("Step 6: Checking environment configuration")
     check_env_file()
     
     print()
@@ -1,11 +1,13 @@
 """Vosk speech-to-text service with streaming support."""
-import json
 import logging
 import os
+import tempfile
 import zipfile
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
+import orjson
 import requests
 from tqdm import tqdm
 from vosk import Model, KaldiRecognizer
@@ -16,13 +18,55 @@ logger = logging.getLogger(__name__)
 VOSK_MODEL_URL = "https://alphacephei.com/vosk/models/vosk-model-en-us-0.22.zip"
 VOSK_MODEL_NAME = "vosk-model-en-us-0.22"
 
+# Model files at least this large get kernel readahead before Kaldi opens them
+PREFETCH_MIN_BYTES = 1 << 20
+
+
+def _prefetch_model_files(model_path: Path) -> None:
+    """Ask the kernel to start reading the large model files (final.mdl, HCLG.fst) into the page cache."""
+    if not hasattr(os, "posix_fadvise"):
+        return  # Not available on Windows/macOS
+    
+    for path in model_path.rglob("*"):
+        try:
+            if not path.is_file() or path.stat().st_size < PREFETCH_MIN_BYTES:
+                continue
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            logger.debug(f"Skipping prefetch of {path}: {e}")
+
+
+@lru_cache(maxsize=2)
+def _get_vosk_model(path: str) -> Model:
+    """
+    Load a Vosk model once per path and share it.
+    
+    A Model is read-only after loading and safe to use from several recognizers at
+    once; all per-stream decoding state lives in each KaldiRecognizer.
+    """
+    logger.info(f"Loading Vosk model from {path}")
+    # Readahead runs in the background while Kaldi parses the files it opens first
+    _prefetch_model_files(Path(path))
+    return Model(path)
+
 
 class VoskSTT:
     """Streaming speech-to-text using Vosk with US English model."""
 
-    def __init__(self, model_path: str):
-        """Load Vosk model from disk, raise error if not found."""
+    def __init__(self, model_path: str, enable_words: bool = False):
+        """
+        Load Vosk model from disk, raise error if not found.
+        
+        Args:
+            model_path: Path to the Vosk model directory
+            enable_words: Include per-word timings in results (larger JSON on every chunk)
+        """
         self.model_path = Path(model_path)
+        self.enable_words = enable_words
         self.model: Optional[Model] = None
         self.recognizer: Optional[KaldiRecognizer] = None
         self.sample_rate = 16000
@@ -36,17 +80,30 @@ class VoskSTT:
                 f"Run 'python setup.py' to download the model."
             )
         
-        logger.info(f"Loading Vosk model from {self.model_path}")
-        self.model = Model(str(self.model_path))
+        # Every session shares the loaded model; only the recognizer is per instance
+        self.model = _get_vosk_model(str(self.model_path))
+        self._create_recognizer()
+        
+        logger.info("Vosk model loaded successfully")
+
+    def _create_recognizer(self) -> None:
+        """Create a fresh recognizer and bind its per-chunk methods."""
         self.recognizer = KaldiRecognizer(self.model, self.sample_rate)
-        self.recognizer.SetWords(True)
+        self.recognizer.SetWords(self.enable_words)
         
         # Configure Vosk to be less aggressive with end-of-speech detection
         # This makes it wait longer before finalizing transcripts
         self.recognizer.SetMaxAlternatives(0)  # Disable alternatives for faster processing
         self.recognizer.SetPartialWords(False)  # Don't split words in partial results
         
-        logger.info("Vosk model loaded successfully")
+        # Bound once here - transcribe_stream calls these tens of times per second
+        self._accept_waveform = self.recognizer.AcceptWaveform
+        self._result = self.recognizer.Result
+        self._partial_result = self.recognizer.PartialResult
+        
+        # Consecutive chunks often return the same partial - only parse when it changes
+        self._last_partial_raw = ""
+        self._last_partial_text = ""
 
     @staticmethod
     def initialize(model_path: str = f"models/{VOSK_MODEL_NAME}") -> None:
@@ -60,25 +117,25 @@ class VoskSTT:
         models_dir = model_dir.parent
         models_dir.mkdir(parents=True, exist_ok=True)
         
-        zip_path = models_dir / f"{VOSK_MODEL_NAME}.zip"
-        
         logger.info(f"Downloading Vosk model from {VOSK_MODEL_URL}")
         response = requests.get(VOSK_MODEL_URL, stream=True)
         response.raise_for_status()
         
         total_size = int(response.headers.get("content-length", 0))
         
-        with open(zip_path, "wb") as f:
+        # The ~1.8GB archive spills to an anonymous temp file and is extracted from there,
+        # instead of being saved next to the model and read back
+        with tempfile.SpooledTemporaryFile(max_size=128 << 20) as archive:
             with tqdm(total=total_size, unit="B", unit_scale=True, desc="Downloading") as pbar:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+                for chunk in response.iter_content(chunk_size=1 << 20):
+                    archive.write(chunk)
                     pbar.update(len(chunk))
+            
+            logger.info("Extracting model archive")
+            archive.seek(0)
+            with zipfile.ZipFile(archive, "r", allowZip64=True) as zip_ref:
+                zip_ref.extractall(models_dir)
         
-        logger.info("Extracting model archive")
-        with zipfile.ZipFile(zip_path, "r") as zip_ref:
-            zip_ref.extractall(models_dir)
-        
-        zip_path.unlink()
         logger.info(f"Vosk model ready at {model_dir}")
 
     def transcribe_stream(self, audio_chunk: bytes) -> dict:
@@ -89,12 +146,15 @@ class VoskSTT:
         result = {"partial": "", "final": ""}
         
         try:
-            if self.recognizer.AcceptWaveform(audio_chunk):
-                final_result = json.loads(self.recognizer.Result())
+            if self._accept_waveform(audio_chunk):
+                final_result = orjson.loads(self._result())
                 result["final"] = final_result.get("text", "")
             else:
-                partial_result = json.loads(self.recognizer.PartialResult())
-                result["partial"] = partial_result.get("partial", "")
+                raw = self._partial_result()
+                if raw != self._last_partial_raw:
+                    self._last_partial_raw = raw
+                    self._last_partial_text = orjson.loads(raw).get("partial", "")
+                result["partial"] = self._last_partial_text
         except Exception as e:
             logger.error(f"Error transcribing audio: {e}")
         
@@ -105,14 +165,13 @@ class VoskSTT:
         if self.recognizer is None:
             return ""
         
-        final_result = json.loads(self.recognizer.FinalResult())
+        final_result = orjson.loads(self.recognizer.FinalResult())
         return final_result.get("text", "")
 
     def reset(self) -> None:
         """Reset recognizer state for new conversation."""
         if self.model is not None:
-            self.recognizer = KaldiRecognizer(self.model, self.sample_rate)
-            self.recognizer.SetWords(True)
+            self._create_recognizer()
             logger.debug("Recognizer state reset")
 
     def is_ready(self) -> bool:
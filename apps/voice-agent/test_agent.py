@@ -1,44 +1,66 @@
 """Test script for voice agent microservice."""
+import argparse
 import asyncio
 import io
 import json
 import logging
 import os
 import sys
+import threading
 import time
 import wave
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Optional
 
 import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
 
 logging.basicConfig(
     level=logging.INFO,
-    format="[%(asctime)s] [%(levelname)s] %(message)s",
+    format="[%(asctime)s] [%(levelname)s] [%(threadName)s] %(message)s",
     datefmt="%H:%M:%S"
 )
 logger = logging.getLogger(__name__)
 
 BASE_URL = "http://localhost:8000"
+APP_DIR = Path(__file__).parent
+
+# Test groups selectable with --only; "health" covers the HTTP API tests
+TEST_GROUPS = ("health", "stt", "llm", "tts", "pipeline")
+
+# One keep-alive connection pool for every API call instead of a new TCP connection per request
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
+_SESSION.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
+
+
+def _ensure_path() -> None:
+    """Make the service packages importable for the direct tests (once)."""
+    if str(APP_DIR) not in sys.path:
+        sys.path.insert(0, str(APP_DIR))
 
 
 def generate_test_audio(duration: float = 2.0, sample_rate: int = 16000) -> bytes:
     """Generate a test audio file (sine wave tone)."""
     frequency = 440
-    t = np.linspace(0, duration, int(sample_rate * duration), dtype=np.float32)
-    audio = (0.5 * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
     
-    audio_int16 = (audio * 32767).astype(np.int16)
+    # Phase, sine and scale computed in place in one float32 buffer
+    wave_data = np.arange(int(sample_rate * duration), dtype=np.float32)
+    np.multiply(wave_data, np.float32(2 * np.pi * frequency / sample_rate), out=wave_data)
+    np.sin(wave_data, out=wave_data)
+    wave_data *= np.float32(0.5 * 32767)  # Half amplitude
+    audio_int16 = wave_data.astype(np.int16)
     
     buffer = io.BytesIO()
     with wave.open(buffer, 'wb') as wav_file:
         wav_file.setnchannels(1)
         wav_file.setsampwidth(2)
         wav_file.setframerate(sample_rate)
-        wav_file.writeframes(audio_int16.tobytes())
+        wav_file.writeframes(audio_int16)
     
-    buffer.seek(0)
-    return buffer.read()
+    return buffer.getvalue()
 
 
 def test_health_check() -> bool:
@@ -47,7 +69,7 @@ def test_health_check() -> bool:
     
     try:
         start = time.time()
-        response = requests.get(f"{BASE_URL}/health", timeout=10)
+        response = _SESSION.get(f"{BASE_URL}/health", timeout=10)
         latency = (time.time() - start) * 1000
         
         if response.status_code == 200:
@@ -83,7 +105,7 @@ def test_start_session() -> str | None:
         }
         
         start = time.time()
-        response = requests.post(
+        response = _SESSION.post(
             f"{BASE_URL}/sessions/start",
             json=payload,
             timeout=30
@@ -112,7 +134,7 @@ def test_session_status(session_id: str) -> bool:
     logger.info("Testing session status...")
     
     try:
-        response = requests.get(
+        response = _SESSION.get(
             f"{BASE_URL}/sessions/{session_id}/status",
             timeout=10
         )
@@ -137,7 +159,7 @@ def test_end_session(session_id: str) -> bool:
     logger.info("Testing session end...")
     
     try:
-        response = requests.post(
+        response = _SESSION.post(
             f"{BASE_URL}/sessions/{session_id}/end",
             timeout=30
         )
@@ -163,7 +185,7 @@ def test_list_sessions() -> bool:
     logger.info("Testing session list...")
     
     try:
-        response = requests.get(f"{BASE_URL}/sessions", timeout=10)
+        response = _SESSION.get(f"{BASE_URL}/sessions", timeout=10)
         
         if response.status_code == 200:
             data = response.json()
@@ -184,7 +206,6 @@ def test_stt_service() -> bool:
     logger.info("Testing STT service...")
     
     try:
-        sys.path.insert(0, str(Path(__file__).parent))
         from stt import VoskSTT
         from config import load_config
         
@@ -213,7 +234,6 @@ def test_llm_service() -> bool:
     logger.info("Testing LLM service...")
     
     try:
-        sys.path.insert(0, str(Path(__file__).parent))
         from llm import GeminiLLM
         from config import load_config
         
@@ -241,8 +261,7 @@ def test_tts_service() -> bool:
     logger.info("Testing TTS service...")
     
     try:
-        sys.path.insert(0, str(Path(__file__).parent))
-        from tts import CoquiTTS
+        from tts.coqui_tts import CoquiTTS
         from config import load_config
         
         config = load_config()
@@ -273,10 +292,9 @@ def test_full_pipeline() -> bool:
     logger.info("Testing full voice pipeline...")
     
     try:
-        sys.path.insert(0, str(Path(__file__).parent))
         from stt import VoskSTT
         from llm import GeminiLLM
-        from tts import CoquiTTS
+        from tts.coqui_tts import CoquiTTS
         from config import load_config
         
         config = load_config()
@@ -326,18 +344,55 @@ def test_full_pipeline() -> bool:
         return False
 
 
-def main() -> int:
-    """Run all tests."""
+def _run_named(name: str, test) -> bool:
+    """Run a test in a worker thread named after it, so its log lines can be told apart."""
+    threading.current_thread().name = name
+    return test()
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """Parse test selection flags."""
+    parser = argparse.ArgumentParser(description="Test the voice agent microservice.")
+    parser.add_argument(
+        "--only",
+        choices=TEST_GROUPS,
+        help="Run a single test group (health = the HTTP API tests against a running server)"
+    )
+    parser.add_argument(
+        "--skip-direct",
+        action="store_true",
+        help="Skip the direct STT/LLM/TTS/pipeline tests, which import and load the models"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Run the selected tests, closing the shared HTTP session afterwards."""
+    args = parse_args(argv)
+    try:
+        return run_tests(args)
+    finally:
+        _SESSION.close()
+
+
+def run_tests(args: argparse.Namespace) -> int:
+    """Run each selected test and report overall success."""
+    def selected(group: str) -> bool:
+        if args.only:
+            return args.only == group
+        return group == "health" or not args.skip_direct
+    
     logger.info("=" * 60)
     logger.info("Voice Agent Service Tests")
     logger.info("=" * 60)
     
     results = {}
     
-    print()
-    results["health"] = test_health_check()
+    if selected("health"):
+        print()
+        results["health"] = test_health_check()
     
-    if results["health"]:
+    if results.get("health"):
         print()
         results["list_sessions"] = test_list_sessions()
         
@@ -354,20 +409,33 @@ def main() -> int:
             print()
             results["end_session"] = test_end_session(session_id)
     
-    print()
-    logger.info("Direct service tests (requires .env configuration):")
-    
-    print()
-    results["stt"] = test_stt_service()
+    direct_tests = {
+        name: test
+        for name, test in (("stt", test_stt_service), ("llm", test_llm_service), ("tts", test_tts_service))
+        if selected(name)
+    }
     
-    print()
-    results["llm"] = test_llm_service()
+    # Service modules (and torch, via Coqui) are only imported when a direct test runs
+    if direct_tests or selected("pipeline"):
+        _ensure_path()
+        print()
+        logger.info("Direct service tests (requires .env configuration):")
     
-    print()
-    results["tts"] = test_tts_service()
+    # Independent and each dominated by model loading - run together, wall time is the slowest one
+    if direct_tests:
+        print()
+        with ThreadPoolExecutor(max_workers=len(direct_tests)) as executor:
+            futures = {
+                name: executor.submit(_run_named, name, test)
+                for name, test in direct_tests.items()
+            }
+            for name, future in futures.items():
+                results[name] = future.result()
     
-    print()
-    results["pipeline"] = test_full_pipeline()
+    # Needs all three services, so it runs after them on its own
+    if selected("pipeline"):
+        print()
+        results["pipeline"] = test_full_pipeline()
     
     print()
     logger.info("=" * 60)
@@ -1,3 +1,4 @@
+from .audio_cache import AudioCache
 from .piper_tts import PiperTTS
 
-__all__ = ["PiperTTS"]
+__all__ = ["AudioCache", "PiperTTS"]
@@ -0,0 +1,133 @@
+"""Content-addressed cache of synthesized audio for repeated phrases."""
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "veezy-tts"
+
+
+class AudioCache:
+    """WAV bytes keyed by sha1(model|text): small in-memory LRU in front of a bounded disk directory."""
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = DEFAULT_CACHE_DIR,
+        max_memory_entries: int = 64,
+        max_disk_bytes: int = 256 << 20
+    ):
+        """
+        Create the cache.
+
+        Args:
+            cache_dir: Directory for cached WAV files, or None for memory only
+            max_memory_entries: Least recently used entries are evicted from memory beyond this
+            max_disk_bytes: Oldest files are pruned once the directory grows past this size
+        """
+        self.cache_dir = cache_dir
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()  # Synthesis runs in worker threads
+        self._disk_bytes = 0
+
+        if self.cache_dir is not None:
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                self._disk_bytes = sum(p.stat().st_size for p in self.cache_dir.glob("*.wav"))
+            except OSError as e:
+                logger.warning(f"TTS disk cache disabled: {e}")
+                self.cache_dir = None
+
+    @staticmethod
+    def _key(model_id: str, text: str) -> str:
+        """Content address of an utterance for a given voice/model."""
+        return hashlib.sha1(f"{model_id}|{text.strip()}".encode()).hexdigest()
+
+    def _remember(self, key: str, audio: bytes) -> None:
+        """Insert into the memory LRU (caller holds the lock)."""
+        self._entries[key] = audio
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_memory_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, model_id: str, text: str) -> Optional[bytes]:
+        """Return cached audio for this model and text, if any."""
+        key = self._key(model_id, text)
+        with self._lock:
+            audio = self._entries.get(key)
+            if audio is not None:
+                self._entries.move_to_end(key)
+                return audio
+
+        if self.cache_dir is None:
+            return None
+
+        path = self.cache_dir / f"{key}.wav"
+        try:
+            audio = path.read_bytes()
+            os.utime(path)  # Mark as recently used for pruning
+        except OSError:
+            return None
+
+        with self._lock:
+            self._remember(key, audio)
+        return audio
+
+    def put(self, model_id: str, text: str, audio: bytes) -> None:
+        """Store audio in memory and on disk (written atomically)."""
+        key = self._key(model_id, text)
+        with self._lock:
+            self._remember(key, audio)
+
+        if self.cache_dir is None:
+            return
+
+        path = self.cache_dir / f"{key}.wav"
+        tmp_path = path.with_name(f"{key}.{threading.get_ident()}.tmp")
+        try:
+            tmp_path.write_bytes(audio)
+            try:
+                replaced_bytes = path.stat().st_size  # Overwriting an entry doesn't grow the directory
+            except FileNotFoundError:
+                replaced_bytes = 0
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.debug(f"Could not write TTS cache entry: {e}")
+            return
+
+        with self._lock:
+            self._disk_bytes += len(audio) - replaced_bytes
+            if self._disk_bytes > self.max_disk_bytes:
+                self._prune()
+
+    def _prune(self) -> None:
+        """Delete least recently used files until the directory is under 3/4 of its limit (caller holds the lock)."""
+        files = []
+        for path in self.cache_dir.glob("*.wav"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+
+        total = sum(size for _, size, _ in files)
+        target = self.max_disk_bytes * 3 // 4
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                continue
+        self._disk_bytes = total
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,12 +1,32 @@
 """Coqui TTS service for text-to-speech synthesis."""
 import asyncio
-import io
 import logging
 import re
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from math import gcd
 from typing import AsyncGenerator, Optional
 
 import numpy as np
-import soundfile as sf
+
+from .audio_cache import AudioCache
+from .wav import to_wav
+
+# Resampler backends, fastest first: libsamplerate, scipy's polyphase filter, then np.interp
+try:
+    import samplerate  # type: ignore
+    SAMPLERATE_AVAILABLE = True
+except ImportError:
+    SAMPLERATE_AVAILABLE = False
+    samplerate = None
+
+try:
+    from scipy.signal import firwin, resample_poly
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
 
 # Try to import TTS, fall back to mock if import fails
 try:
@@ -19,16 +39,63 @@ except Exception as e:
 
 logger = logging.getLogger(__name__)
 
+# Sentences synthesized ahead of the one being played back
+SYNTH_LOOKAHEAD = 2
+
+# Throwaway inputs run at load time - a short and a longer one, since kernels are picked per input shape
+WARMUP_TEXTS = ("Hi.", "This sentence warms up the model before the first caller needs it.")
+
+# Whitespace following sentence-ending punctuation
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+
+# Silence lengths (seconds) used for mock, empty-text and error results
+SILENCE_DURATIONS = (0.1, 0.2, 0.5, 1.0)
+
+
+@lru_cache(maxsize=8)
+def _resample_filter(up: int, down: int) -> np.ndarray:
+    """Anti-aliasing FIR for resample_poly, designed once per ratio (scipy's default design)."""
+    max_rate = max(up, down)
+    half_len = 10 * max_rate
+    return firwin(2 * half_len + 1, 1.0 / max_rate, window=("kaiser", 5.0)).astype(np.float32)
+
+
+def _to_pcm16(audio: np.ndarray) -> np.ndarray:
+    """Convert float audio to int16, saturating instead of wrapping past full scale (modifies audio)."""
+    np.clip(audio, -1.0, 1.0, out=audio)
+    audio *= 32767.0
+    return audio.astype(np.int16)
+
 
 class CoquiTTS:
     """Streaming text-to-speech using Coqui TTS."""
 
-    def __init__(self, model_name: str = "tts_models/en/ljspeech/tacotron2-DDC"):
-        """Load TTS model."""
+    def __init__(
+        self, 
+        model_name: str = "tts_models/en/ljspeech/tacotron2-DDC",
+        force_resample_to: Optional[int] = None
+    ):
+        """
+        Load TTS model.
+        
+        Args:
+            model_name: Coqui model identifier
+            force_resample_to: Output sample rate, if a consumer can't take the model's
+                               native rate; by default audio is returned unresampled
+        """
         self.model_name = model_name
         self.tts: Optional[TTS] = None 
         self.sample_rate = 22050
-        self.output_sample_rate = 16000
+        # WAV output carries its rate and LiveKit frames accept any rate - the cheapest resample is none
+        self.output_sample_rate = force_resample_to or self.sample_rate
+        # Coqui models keep decoder/attention state on the module during inference
+        self._model_lock = threading.Lock()
+        # Repeated phrases (greetings, fallbacks) are served from here instead of re-synthesized
+        self.audio_cache = AudioCache()
+        # Cached WAVs are written at the output rate, so instances resampling differently keep separate entries
+        self._cache_id = f"{self.model_name}@{self.output_sample_rate}"
+        # Built once; bytes are immutable, so every caller and thread can share them
+        self._silence = {d: self._build_silence(d) for d in SILENCE_DURATIONS}
         if TTS_AVAILABLE:
             self._load_model()
         else:
@@ -43,16 +110,42 @@ class CoquiTTS:
         except Exception as e:
             logger.error(f"Failed to load TTS model: {e}")
             raise
+        
+        self._warm_up()
+
+    def _warm_up(self) -> None:
+        """Run throwaway syntheses so the first real utterance doesn't pay cold-start costs."""
+        start = time.monotonic()
+        try:
+            with self._model_lock:
+                for text in WARMUP_TEXTS:
+                    self.tts.tts(text=text)
+            logger.info(f"Coqui TTS warmed up in {(time.monotonic() - start) * 1000:.0f}ms")
+        except Exception as e:
+            logger.warning(f"Coqui TTS warm-up failed: {e}")
 
     def _resample_audio(self, audio: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
-        """Resample audio to target sample rate."""
+        """Resample audio to target sample rate with the fastest available backend."""
         if orig_sr == target_sr:
             return audio
         
-        duration = len(audio) / orig_sr
-        new_length = int(duration * target_sr)
-        indices = np.linspace(0, len(audio) - 1, new_length)
-        return np.interp(indices, np.arange(len(audio)), audio)
+        audio = audio.astype(np.float32, copy=False)
+        
+        if SAMPLERATE_AVAILABLE:
+            # libsamplerate's SIMD sinc converter
+            return samplerate.resample(audio, target_sr / orig_sr, "sinc_fastest")
+        
+        if SCIPY_AVAILABLE:
+            # Polyphase FIR over the reduced ratio, e.g. 22050 -> 16000 is 320/441
+            divisor = gcd(orig_sr, target_sr)
+            up, down = target_sr // divisor, orig_sr // divisor
+            return resample_poly(audio, up, down, window=_resample_filter(up, down))
+        
+        # Last resort: linear interpolation (aliases, but needs nothing beyond numpy)
+        new_length = len(audio) * target_sr // orig_sr
+        positions = np.arange(new_length, dtype=np.float32)
+        positions *= np.float32(orig_sr / target_sr)
+        return np.interp(positions, np.arange(len(audio), dtype=np.float32), audio).astype(np.float32)
 
     def synthesize(self, text: str) -> bytes:
         """Convert text to audio WAV bytes."""
@@ -63,45 +156,59 @@ class CoquiTTS:
         if not text or not text.strip():
             return self._generate_silence(0.1)
         
+        cached = self.audio_cache.get(self._cache_id, text)
+        if cached is not None:
+            return cached
+        
         try:
-            audio = self.tts.tts(text=text.strip())
-            audio_array = np.array(audio, dtype=np.float32)
+            wav_bytes = self._to_wav(self._synth_pcm16_np(text).tobytes())
+            self.audio_cache.put(self._cache_id, text, wav_bytes)
+            return wav_bytes
             
-            resampled = self._resample_audio(
+        except Exception as e:
+            logger.error(f"TTS synthesis error: {e}")
+            return self._generate_silence(0.5)
+
+    def _synth_pcm16_np(self, text: str) -> np.ndarray:
+        """Run the model and return int16 samples at the output rate."""
+        with self._model_lock:
+            audio = self.tts.tts(text=text.strip())
+        # No copy when the model already hands back a float32 array
+        audio_array = np.asarray(audio, dtype=np.float32)
+        
+        if self.output_sample_rate != self.sample_rate:
+            audio_array = self._resample_audio(
                 audio_array, 
                 self.sample_rate, 
                 self.output_sample_rate
             )
-            
-            buffer = io.BytesIO()
-            sf.write(buffer, resampled, self.output_sample_rate, format="WAV")
-            buffer.seek(0)
-            
-            return buffer.read()
-            
-        except Exception as e:
-            logger.error(f"TTS synthesis error: {e}")
-            return self._generate_silence(0.5)
+        
+        return _to_pcm16(audio_array)
 
     def _generate_silence(self, duration: float) -> bytes:
-        """Generate silent audio for error cases."""
+        """Silent audio for error cases (prebuilt for SILENCE_DURATIONS)."""
+        silence = self._silence.get(duration)
+        return silence if silence is not None else self._build_silence(duration)
+
+    def _build_silence(self, duration: float) -> bytes:
+        """Encode silent WAV audio of the given length."""
         samples = int(self.output_sample_rate * duration)
-        silence = np.zeros(samples, dtype=np.float32)
-        
-        buffer = io.BytesIO()
-        sf.write(buffer, silence, self.output_sample_rate, format="WAV")
-        buffer.seek(0)
-        
-        return buffer.read()
+        return self._to_wav(b"\x00" * (samples * 2))  # 16-bit = 2 bytes per sample
+
+    def _to_wav(self, pcm: bytes) -> bytes:
+        """Wrap 16-bit mono PCM at the output rate in a WAV container."""
+        return to_wav(pcm, self.output_sample_rate)
 
     def _split_into_sentences(self, text: str) -> list[str]:
         """Split text into sentences for incremental synthesis."""
-        sentence_endings = r'(?<=[.!?])\s+'
-        sentences = re.split(sentence_endings, text.strip())
-        return [s.strip() for s in sentences if s.strip()]
+        return [s for s in map(str.strip, _SENTENCE_BREAK.split(text.strip())) if s]
 
     async def synthesize_stream(self, text: str) -> AsyncGenerator[bytes, None]:
-        """Async generator yielding audio chunks for streaming."""
+        """Async generator yielding audio chunks for streaming, in sentence order.
+        
+        Up to SYNTH_LOOKAHEAD sentences are synthesized ahead, so the next sentence
+        is being generated while the consumer plays the current one.
+        """
         if not text or not text.strip():
             yield self._generate_silence(0.1)
             return
@@ -111,13 +218,27 @@ class CoquiTTS:
         if not sentences:
             sentences = [text]
         
-        for sentence in sentences:
-            try:
-                audio_bytes = await asyncio.to_thread(self.synthesize, sentence)
+        upcoming = iter(sentences)
+        pending: deque[asyncio.Task] = deque()
+        
+        try:
+            while True:
+                while len(pending) < SYNTH_LOOKAHEAD and (sentence := next(upcoming, None)) is not None:
+                    pending.append(asyncio.create_task(asyncio.to_thread(self.synthesize, sentence)))
+                
+                if not pending:
+                    break
+                
+                try:
+                    audio_bytes = await pending.popleft()
+                except Exception as e:
+                    logger.error(f"Error synthesizing sentence: {e}")
+                    audio_bytes = self._generate_silence(0.2)
                 yield audio_bytes
-            except Exception as e:
-                logger.error(f"Error synthesizing sentence: {e}")
-                yield self._generate_silence(0.2)
+        finally:
+            # Consumer stopped early - drop sentences that haven't started
+            for task in pending:
+                task.cancel()
 
     def synthesize_pcm(self, text: str) -> tuple[bytes, int]:
         """Convert text to raw PCM audio bytes (no WAV header)."""
@@ -133,18 +254,7 @@ class CoquiTTS:
             return silence.tobytes(), self.output_sample_rate
         
         try:
-            audio = self.tts.tts(text=text.strip())
-            audio_array = np.array(audio, dtype=np.float32)
-            
-            resampled = self._resample_audio(
-                audio_array,
-                self.sample_rate,
-                self.output_sample_rate
-            )
-            
-            pcm_audio = (resampled * 32767).astype(np.int16)
-            
-            return pcm_audio.tobytes(), self.output_sample_rate
+            return self._synth_pcm16_np(text).tobytes(), self.output_sample_rate
             
         except Exception as e:
             logger.error(f"PCM synthesis error: {e}")
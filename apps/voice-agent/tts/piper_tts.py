@@ -1,35 +1,120 @@
 """Piper TTS service - Fast, high-quality text-to-speech synthesis."""
-import io
+import asyncio
+import json
 import logging
-import wave
+import os
+import threading
+import time
 from pathlib import Path
-from typing import Optional
+from typing import AsyncGenerator, Iterator, Optional, Union
 
 import numpy as np
+import onnxruntime as ort
 from piper import PiperVoice
+from piper.config import PiperConfig
+
+from .audio_cache import AudioCache
+from .wav import WAV_HEADER_BYTES, to_wav
 
 logger = logging.getLogger(__name__)
 
+# Silence lengths (ms) used for empty-text and error results
+SILENCE_DURATIONS_MS = (100, 500)
+
+# Throwaway inputs run at load time - a short and a longer one, since ORT picks kernels per input shape
+WARMUP_TEXTS = ("Hi.", "This sentence warms up the model before the first caller needs it.")
+
+# Roughly the physical core count - SMT siblings add little to ONNX Runtime's GEMM throughput
+ORT_INTRA_OP_THREADS = max(1, (os.cpu_count() or 2) // 2)
+
+
+def _create_session(model_path: Path) -> ort.InferenceSession:
+    """
+    Build the ONNX Runtime session for a Piper model with explicit tuning.
+    
+    On CPU the fully optimized graph is saved next to the model on first load and
+    reused afterwards, skipping the graph rewrite at startup. The saved graph is
+    specific to the ONNX Runtime build, so its name carries the ORT version
+    ("<model>.ort<version>.opt"), and an unloadable one is rebuilt from the model.
+    """
+    available = ort.get_available_providers()
+    providers = [p for p in ("CUDAExecutionProvider", "CPUExecutionProvider") if p in available]
+    
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = ORT_INTRA_OP_THREADS
+    # Piper's VITS graph is a single chain; ORT_PARALLEL only adds scheduling overhead
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if providers != ["CPUExecutionProvider"]:
+        # Optimized graphs are provider specific - only the CPU one is cached
+        return ort.InferenceSession(str(model_path), sess_options=options, providers=providers)
+    
+    optimized_path = model_path.with_name(f"{model_path.name}.ort{ort.__version__}.opt")
+    if optimized_path.exists() and optimized_path.stat().st_mtime >= model_path.stat().st_mtime:
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+        try:
+            return ort.InferenceSession(str(optimized_path), sess_options=options, providers=providers)
+        except Exception as e:
+            logger.warning(f"Cached optimized model {optimized_path} failed to load, rebuilding it: {e}")
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    
+    options.optimized_model_filepath = str(optimized_path)
+    return ort.InferenceSession(str(model_path), sess_options=options, providers=providers)
+
 
 class PiperTTS:
     """Text-to-speech using Piper (ONNX-based, very fast)."""
 
-    def __init__(self, model_path: str):
+    def __init__(self, model_path: str, prefer_int8: bool = True):
         """
         Initialize Piper TTS with specified model.
         
         Args:
             model_path: Path to Piper .onnx model file
+            prefer_int8: Load the int8 quantized copy ("<name>.int8.onnx", written by
+                         setup.py) instead when it exists - roughly 2x faster on CPU.
+                         Falls back to model_path if the int8 copy fails to load.
         """
-        self.model_path = Path(model_path)
-        self.config_path = self.model_path.with_suffix('.onnx.json')
+        self.fp32_model_path = Path(model_path)
+        self._use_model(self.fp32_model_path)
+        if prefer_int8:
+            int8_path = self.fp32_model_path.with_suffix(".int8.onnx")
+            if int8_path.exists() and int8_path.with_suffix(".onnx.json").exists():
+                self._use_model(int8_path)
         self.voice: Optional[PiperVoice] = None
         self.sample_rate = 22050  # Piper default sample rate
+        # Repeated phrases (greetings, fallbacks) are served from here instead of re-synthesized
+        self.audio_cache = AudioCache()
+        # Built once; bytes are immutable, so every caller and thread can share them
+        self._silence = {d: self._build_silence(d) for d in SILENCE_DURATIONS_MS}
         
         self._load_model()
 
+    def _use_model(self, model_path: Path) -> None:
+        """Point the service at a model file and its config."""
+        self.model_path = model_path
+        self.config_path = model_path.with_suffix('.onnx.json')
+
     def _load_model(self) -> None:
-        """Load the Piper voice model."""
+        """Load the Piper voice model, falling back to full precision if the int8 copy is unusable."""
+        if self.model_path == self.fp32_model_path:
+            self._load_voice()
+            self._warm_up()
+            return
+        
+        try:
+            self._load_voice()
+            if not self._warm_up():
+                raise RuntimeError("warm-up synthesis failed")
+        except Exception as e:
+            logger.error(f"Int8 Piper model {self.model_path} is unusable ({e}); loading {self.fp32_model_path}")
+            self._use_model(self.fp32_model_path)
+            self._load_voice()
+            self._warm_up()
+
+    def _load_voice(self) -> None:
+        """Load the Piper voice for the current model_path."""
         if not self.model_path.exists():
             raise FileNotFoundError(
                 f"Piper model not found at {self.model_path}. "
@@ -42,15 +127,35 @@ class PiperTTS:
                 f"Please download the .onnx.json file alongside the model."
             )
         
+        # Audio cache namespace - voices can share a file name, and a replaced model must not reuse old audio
+        stat = self.model_path.stat()
+        self._cache_id = f"{self.model_path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}"
+        
         logger.info(f"Loading Piper model from {self.model_path}")
         
         try:
-            self.voice = PiperVoice.load(str(self.model_path), str(self.config_path))
+            # Build the voice around our tuned session - PiperVoice.load would create a second one
+            config = PiperConfig.from_dict(json.loads(self.config_path.read_text(encoding="utf-8")))
+            self.voice = PiperVoice(session=_create_session(self.model_path), config=config)
             logger.info("Piper TTS model loaded successfully")
         except Exception as e:
             logger.error(f"Failed to load Piper model: {e}")
             raise
 
+    def _warm_up(self) -> bool:
+        """Run throwaway syntheses so the first real utterance doesn't pay cold-start costs; False if they failed."""
+        start = time.monotonic()
+        try:
+            # Straight to the model - synthesize() could answer from the audio cache
+            for text in WARMUP_TEXTS:
+                for _ in self._iter_chunks(text):
+                    pass
+            logger.info(f"Piper TTS warmed up in {(time.monotonic() - start) * 1000:.0f}ms")
+            return True
+        except Exception as e:
+            logger.warning(f"Piper TTS warm-up failed: {e}")
+            return False
+
     def synthesize(self, text: str) -> bytes:
         """
         Convert text to speech audio bytes.
@@ -67,28 +172,21 @@ class PiperTTS:
         if not text or not text.strip():
             return self._generate_silence(100)
         
+        cached = self.audio_cache.get(self._cache_id, text)
+        if cached is not None:
+            return cached
+        
         try:
-            # Synthesize with Piper (returns generator of AudioChunk objects)
-            audio_bytes = b''
-            
-            # Each AudioChunk has audio_int16_bytes property for raw PCM data
-            for audio_chunk in self.voice.synthesize(text):
-                audio_bytes += audio_chunk.audio_int16_bytes
+            audio_bytes = self._synth_pcm16(text)
             
             if not audio_bytes:
                 logger.warning("No audio generated, returning silence")
                 return self._generate_silence(100)
             
-            # Convert raw PCM to WAV format
-            wav_buffer = io.BytesIO()
-            with wave.open(wav_buffer, 'wb') as wav_file:
-                wav_file.setnchannels(1)  # Mono
-                wav_file.setsampwidth(2)  # 16-bit
-                wav_file.setframerate(self.sample_rate)
-                wav_file.writeframes(audio_bytes)
-            
             logger.info(f"Synthesized {len(audio_bytes)} bytes of audio")
-            return wav_buffer.getvalue()
+            wav_bytes = self._to_wav(audio_bytes)
+            self.audio_cache.put(self._cache_id, text, wav_bytes)
+            return wav_bytes
             
         except Exception as e:
             logger.error(f"TTS synthesis error: {e}")
@@ -96,34 +194,140 @@ class PiperTTS:
             logger.error(traceback.format_exc())
             return self._generate_silence(500)
 
+    def synthesize_pcm(self, text: str) -> tuple[bytes, int]:
+        """
+        Convert text to raw PCM audio bytes (no WAV header), like CoquiTTS.synthesize_pcm.
+        
+        Args:
+            text: Text to synthesize
+            
+        Returns:
+            Mono PCM16 bytes and their sample rate
+        """
+        if not self.voice:
+            raise RuntimeError("Piper voice not loaded")
+        
+        if not text or not text.strip():
+            return self._generate_silence(100)[WAV_HEADER_BYTES:], self.sample_rate
+        
+        cached = self.audio_cache.get(self._cache_id, text)
+        if cached is not None:
+            return cached[WAV_HEADER_BYTES:], self.sample_rate
+        
+        try:
+            audio_bytes = self._synth_pcm16(text)
+            
+            if not audio_bytes:
+                logger.warning("No audio generated, returning silence")
+                return self._generate_silence(100)[WAV_HEADER_BYTES:], self.sample_rate
+            
+            return audio_bytes, self.sample_rate
+            
+        except Exception as e:
+            logger.error(f"PCM synthesis error: {e}")
+            return self._generate_silence(500)[WAV_HEADER_BYTES:], self.sample_rate
+
+    def _synth_pcm16(self, text: str) -> bytes:
+        """Raw PCM16 for the whole text."""
+        # Chunks joined once at the end instead of re-copying a growing buffer per chunk
+        return b"".join(self._iter_chunks(text))
+
     def _generate_silence(self, duration_ms: int) -> bytes:
-        """Generate silent WAV audio."""
+        """Silent WAV audio (prebuilt for SILENCE_DURATIONS_MS)."""
+        silence = self._silence.get(duration_ms)
+        return silence if silence is not None else self._build_silence(duration_ms)
+
+    def _build_silence(self, duration_ms: int) -> bytes:
+        """Encode silent WAV audio of the given length."""
         num_samples = int(self.sample_rate * duration_ms / 1000)
         silence = b'\x00' * (num_samples * 2)  # 16-bit = 2 bytes per sample
-        
-        wav_buffer = io.BytesIO()
-        with wave.open(wav_buffer, 'wb') as wav_file:
-            wav_file.setnchannels(1)
-            wav_file.setsampwidth(2)
-            wav_file.setframerate(self.sample_rate)
-            wav_file.writeframes(silence)
-        
-        return wav_buffer.getvalue()
+        return self._to_wav(silence)
+
+    def _to_wav(self, pcm: bytes) -> bytes:
+        """Wrap raw PCM in a WAV container (22050 Hz, mono, PCM16)."""
+        return to_wav(pcm, self.sample_rate)
 
-    async def synthesize_stream(self, text: str):
+    def _iter_chunks(self, text: str) -> Iterator[bytes]:
+        """Raw PCM of each chunk (roughly a sentence) as soon as Piper produces it."""
+        for audio_chunk in self.voice.synthesize(text):
+            yield audio_chunk.audio_int16_bytes
+
+    def _pump_chunks(
+        self, 
+        text: str, 
+        queue: asyncio.Queue, 
+        loop: asyncio.AbstractEventLoop, 
+        stop: threading.Event
+    ) -> None:
+        """Run Piper in a worker thread, handing each chunk (or the error) to the event loop, then None."""
+        try:
+            for pcm in self._iter_chunks(text):
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, pcm)
+        except Exception as e:
+            logger.error(f"TTS synthesis error: {e}")
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, None)
+
+    async def synthesize_stream(self, text: str, format: str = "wav") -> AsyncGenerator[bytes, None]:
         """
-        Stream synthesized audio in chunks (async generator).
+        Stream synthesized audio as Piper produces it (async generator).
+        
+        Synthesis runs in a worker thread, so the first chunk can be played while the
+        rest is still being generated and the event loop is never blocked.
         
         Args:
             text: Text to synthesize
+            format: "wav" for a WAV blob per chunk, "pcm16" for raw samples at
+                    output_sample_rate (no header to build or parse)
             
         Yields:
-            Audio chunks as bytes
+            Audio bytes (22050 Hz, mono, PCM16), one per Piper chunk
         """
-        # Piper doesn't support true streaming, so we synthesize the full audio
-        # and yield it as one chunk
-        audio_bytes = self.synthesize(text)
-        yield audio_bytes
+        if format not in ("wav", "pcm16"):
+            raise ValueError(f"Unsupported audio format: {format}")
+        raw = format == "pcm16"
+        
+        if not self.voice:
+            raise RuntimeError("Piper voice not loaded")
+        
+        if not text or not text.strip():
+            silence = self._generate_silence(100)
+            yield silence[WAV_HEADER_BYTES:] if raw else silence
+            return
+        
+        cached = self.audio_cache.get(self._cache_id, text)
+        if cached is not None:
+            yield cached[WAV_HEADER_BYTES:] if raw else cached
+            return
+        
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue[Union[bytes, Exception, None]] = asyncio.Queue()
+        stop = threading.Event()
+        loop.run_in_executor(None, self._pump_chunks, text, queue, loop, stop)
+        
+        parts: list[bytes] = []
+        failed = False
+        try:
+            while (item := await queue.get()) is not None:
+                if isinstance(item, Exception):
+                    failed = True
+                elif item:
+                    parts.append(item)
+                    yield item if raw else self._to_wav(item)
+            
+            if not parts:
+                logger.warning("No audio generated, returning silence")
+                silence = self._generate_silence(100)
+                yield silence[WAV_HEADER_BYTES:] if raw else silence
+            elif not failed:
+                # Only complete utterances are cached; an early stop never reaches here
+                self.audio_cache.put(self._cache_id, text, self._to_wav(b"".join(parts)))
+        finally:
+            # The consumer may stop early (barge-in) - don't synthesize the remaining chunks
+            stop.set()
 
     @property
     def output_sample_rate(self) -> int:
@@ -0,0 +1,22 @@
+"""Minimal WAV container helpers for 16-bit mono PCM."""
+import struct
+
+# RIFF header, "fmt " chunk (PCM, mono, 16-bit) and "data" chunk header - 44 bytes
+_WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+
+# Offset of the samples in WAVs built here
+WAV_HEADER_BYTES = _WAV_HEADER.size
+
+
+def wav_header(num_bytes: int, sample_rate: int) -> bytes:
+    """Header for num_bytes of 16-bit mono PCM at sample_rate."""
+    return _WAV_HEADER.pack(
+        b"RIFF", 36 + num_bytes, b"WAVE",
+        b"fmt ", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,
+        b"data", num_bytes
+    )
+
+
+def to_wav(pcm: bytes, sample_rate: int) -> bytes:
+    """Wrap raw 16-bit mono PCM in a WAV container."""
+    return wav_header(len(pcm), sample_rate) + pcm